@@ -1,27 +1,37 @@
 from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
-import os
-import uuid
-from app.models.user import User
+from pymongo.errors import DuplicateKeyError
+from app.models.user import User, UserSearchView, normalize_email, search_tokens
 from app.models.schemas import UserRegister, UserLogin, TokenResponse, UserUpdate
-from app.auth import hash_password, verify_password, create_access_token, get_current_user
+from app.services.upload_service import save_upload
+from app.services.blob_store import release_blob
+from app.services.matching_service import index_user
+from app.auth import (
+    hash_password_async, verify_password_async, create_user_token, get_current_user,
+    get_current_user_fresh, get_current_principal, Principal, invalidate_user,
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=TokenResponse)
 async def register(body: UserRegister):
-    existing = await User.find_one(User.email == body.email)
+    existing = await User.find_one(User.email == normalize_email(body.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     user = User(
         name=body.name,
         email=body.email,
         phone_number=body.phone_number,
-        hashed_password=hash_password(body.password),
+        hashed_password=await hash_password_async(body.password),
         role=body.role,
     )
-    await user.insert()
-    token = create_access_token({"sub": str(user.id)})
+    try:
+        await user.insert()
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration for the same email
+        raise HTTPException(status_code=400, detail="Email already registered")
+    index_user(user)
+    token = create_user_token(user)
     return TokenResponse(
         access_token=token,
         user_id=str(user.id),
@@ -33,10 +43,17 @@ async def register(body: UserRegister):
 
 @router.post("/login", response_model=TokenResponse)
 async def login(body: UserLogin):
-    user = await User.find_one(User.email == body.email)
-    if not user or not verify_password(body.password, user.hashed_password):
+    user = await User.find_one(User.email == normalize_email(body.email))
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_password_async(body.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token({"sub": str(user.id)})
+    if new_hash:
+        # Cost factor changed since this hash was made; upgrade it transparently
+        await User.find_one(User.id == user.id).update({"$set": {"hashed_password": new_hash}})
+        invalidate_user(user.id)
+    token = create_user_token(user)
     return TokenResponse(
         access_token=token,
         user_id=str(user.id),
@@ -62,7 +79,7 @@ async def get_me(user: User = Depends(get_current_user)):
 
 
 @router.put("/me")
-async def update_me(body: UserUpdate, current_user: User = Depends(get_current_user)):
+async def update_me(body: UserUpdate, current_user: User = Depends(get_current_user_fresh)):
     if body.name is not None:
         current_user.name = body.name
     if body.email is not None:
@@ -73,8 +90,13 @@ async def update_me(body: UserUpdate, current_user: User = Depends(get_current_u
         current_user.bio = body.bio
     if body.company is not None:
         current_user.company = body.company
-        
-    await current_user.save()
+
+    try:
+        await current_user.save()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    invalidate_user(current_user.id)
+    index_user(current_user)
     return {
         "id": str(current_user.id),
         "name": current_user.name,
@@ -89,43 +111,73 @@ async def update_me(body: UserUpdate, current_user: User = Depends(get_current_u
 
 
 @router.post("/avatar")
-async def upload_avatar(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def upload_avatar(file: UploadFile = File(...), current_user: User = Depends(get_current_user_fresh)):
     # Validate file type
-    if not file.content_type.startswith("image/"):
+    if not (file.content_type or "").startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
-        
-    # Generate unique filename
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-    filepath = os.path.join("uploads", filename)
-    
-    # Save file
-    with open(filepath, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-        
-    # Construct URL (assuming server runs on standard host/port or using relative path)
+
+    # Streamed to disk in chunks with the avatar size limit enforced
+    stored = await save_upload(file, "avatar")
     # Using relative path so it works regardless of domain
-    avatar_url = f"/uploads/{filename}"
+    avatar_url = stored.url
+    previous_url = current_user.avatar_url
     
     # Update user
     current_user.avatar_url = avatar_url
     await current_user.save()
-    
+    invalidate_user(current_user.id)
+    if previous_url != avatar_url:
+        await release_blob(previous_url)
+
     return {"avatar_url": avatar_url}
 
 
+def _rank(u: UserSearchView, terms: list[str], query: str) -> int:
+    """Name matches outrank company matches, which outrank role matches."""
+    name_tokens = search_tokens(u.name)
+    company_tokens = search_tokens(u.company)
+    score = 100 if " ".join(name_tokens).startswith(query) else 0
+    for term in terms:
+        if term in name_tokens:
+            score += 15
+        elif any(t.startswith(term) for t in name_tokens):
+            score += 10
+        elif any(t.startswith(term) for t in company_tokens):
+            score += 3
+        else:
+            score += 1  # matched via role
+    return score
+
+
+_SEARCH_CANDIDATES = 50
+
+
+def prefix_filter(field: str, terms: list[str]) -> dict:
+    """Every term must prefix-match a token of `field`; each clause is an index range scan."""
+    return {"$and": [{field: {"$elemMatch": {"$gte": t, "$lt": t + "\uffff"}}} for t in terms]}
+
+
 @router.get("/search")
-async def search_users(q: str, current_user: User = Depends(get_current_user)):
-    if not q:
+async def search_users(q: str, limit: int = 5, current_user: Principal = Depends(get_current_principal)):
+    terms = search_tokens(q)[:5]
+    if not terms:
         return []
-    
-    # Simple search by name
-    users = await User.find(
-        {"name": {"$regex": q, "$options": "i"}},
-        User.id != current_user.id
-    ).limit(5).to_list()
-    
+
+    # The candidate cap is applied in index (alphabetical) order, so name matches
+    # are fetched first and company/role matches only fill the remaining slots
+    candidates = await User.find(
+        prefix_filter("name_terms", terms), User.id != current_user.id,
+    ).limit(_SEARCH_CANDIDATES).project(UserSearchView).to_list()
+    if len(candidates) < _SEARCH_CANDIDATES:
+        seen = [u.id for u in candidates] + [current_user.id]
+        candidates += await User.find(
+            prefix_filter("search_terms", terms), {"_id": {"$nin": seen}},
+        ).limit(_SEARCH_CANDIDATES - len(candidates)).project(UserSearchView).to_list()
+
+    query = " ".join(terms)
+    users = sorted(candidates, key=lambda u: (-_rank(u, terms, query), u.name.casefold()))
+    users = users[:max(1, min(limit, 20))]
+
     return [{
         "id": str(u.id),
         "name": u.name,
@@ -135,7 +187,7 @@ async def search_users(q: str, current_user: User = Depends(get_current_user)):
 
 
 @router.get("/{user_id}")
-async def get_user_by_id(user_id: str, current_user: User = Depends(get_current_user)):
+async def get_user_by_id(user_id: str, current_user: Principal = Depends(get_current_principal)):
     user = await User.get(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,32 +1,65 @@
-from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form
-from typing import List, Optional
-from app.models.community import CommunityPost, CommunityComment
+from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Response
+from typing import Dict, List, Optional
+from app.models.community import CommunityPost, CommunityComment, CommunityPostView
 from beanie import PydanticObjectId
 from app.models.user import User
 from app.models.schemas import PostResponse, CommentCreate, CommentResponse
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_principal, Principal
+from app.services.reaction_service import toggle_reaction, reacted_ids
+from app.services.counter_buffer import counter_buffer
+from app.services.upload_service import save_upload, upload_extension
+from app.services.blob_store import release_blob
+from app.services.post_reaper import wake_reaper
+from app.api.v1.pagination import encode_cursor, keyset_filter
 from datetime import datetime
-import shutil
-import os
-import uuid
 
 router = APIRouter(prefix="/community", tags=["community"])
 
+def _comment_response(c) -> CommentResponse:
+    return CommentResponse(
+        id=str(c.id),
+        post_id=c.post_id,
+        author_id=c.author_id,
+        author_name=c.author_name,
+        author_role=c.author_role,
+        content=c.content,
+        timestamp=c.timestamp
+    )
+
+
 @router.get("/", response_model=List[PostResponse])
-async def get_posts(current_user: User = Depends(get_current_user)):
-    posts = await CommunityPost.find_all().sort("-timestamp").to_list()
-    
-    response = []
+async def get_posts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Feed page, newest first. The cursor for the next page is returned in X-Next-Cursor."""
+    limit = max(1, min(limit, 100))
+    query = {"deleted_at": None}
+    if cursor:
+        query.update(keyset_filter(cursor, "timestamp"))
+    posts = await CommunityPost.find(query).sort(
+        [("timestamp", -1), ("_id", -1)]
+    ).limit(limit).project(CommunityPostView).to_list()
+
+    # Only this page's ids are checked against the user's likes
+    liked = await reacted_ids("post", [p.id for p in posts], str(current_user.id))
+
+    if len(posts) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(posts[-1].timestamp, posts[-1].id)
+
+    result = []
     for p in posts:
-        response.append(PostResponse(
+        result.append(PostResponse(
             id=str(p.id),
             author_id=p.author_id,
             author_name=p.author_name,
             author_role=p.author_role,
             content=p.content,
             timestamp=p.timestamp,
-            likes_count=len(p.likes),
-            has_liked=str(current_user.id) in p.likes,
+            likes_count=p.likes_count + counter_buffer.pending(CommunityPost, "likes_count", p.id),
+            has_liked=p.id in liked,
             comments_count=p.comments_count,
             tags=p.tags,
             has_image=p.has_image,
@@ -36,7 +69,7 @@ async def get_posts(current_user: User = Depends(get_current_user)):
             file_name=p.file_name,
             file_url=p.file_url,
         ))
-    return response
+    return result
 
 @router.post("/", response_model=PostResponse)
 async def create_post(
@@ -57,28 +90,26 @@ async def create_post(
     image_alt = None
     
     if image:
-        ext = os.path.splitext(image.filename)[1]
-        filename = f"{uuid.uuid4()}{ext}"
-        filepath = os.path.join("uploads", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        stored = await save_upload(image, "image")
         has_image = True
-        image_url = f"/uploads/{filename}"
-        image_alt = image.filename
+        image_url = stored.url
+        image_alt = stored.filename
 
     has_file = False
     file_url = None
     file_name = None
     
     if file:
-        ext = os.path.splitext(file.filename)[1].lower()
-        filename = f"{uuid.uuid4()}{ext}"
-        filepath = os.path.join("uploads", filename)
-        with open(filepath, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        current_file_url = f"/uploads/{filename}"
-        current_file_name = file.filename
+        ext = upload_extension(file)
+        try:
+            stored = await save_upload(file, "file")
+        except HTTPException:
+            # Don't leave a reference on the image stored just above
+            await release_blob(image_url)
+            raise
+
+        current_file_url = stored.url
+        current_file_name = stored.filename
         
         # Smart Media Detection: If it's an image and no primary image was uploaded
         image_extensions = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
@@ -127,39 +158,84 @@ async def create_post(
     )
 
 @router.post("/{post_id}/like")
-async def like_post(post_id: str, current_user: User = Depends(get_current_user)):
-    post = await CommunityPost.get(post_id)
-    if not post:
+async def like_post(post_id: str, current_user: Principal = Depends(get_current_principal)):
+    if not PydanticObjectId.is_valid(post_id):
         raise HTTPException(status_code=404, detail="Post not found")
-    
-    uid = str(current_user.id)
-    if uid in post.likes:
-        post.likes.remove(uid)
-    else:
-        post.likes.append(uid)
-    
-    await post.save()
-    return {"likes_count": len(post.likes), "has_liked": uid in post.likes}
+    result = await toggle_reaction(
+        CommunityPost, "post", PydanticObjectId(post_id), str(current_user.id), "likes_count"
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    likes_count, has_liked = result
+    return {"likes_count": likes_count, "has_liked": has_liked}
+
+@router.get("/comments/preview", response_model=Dict[str, List[CommentResponse]])
+async def preview_comments(
+    post_ids: str,
+    limit: int = 3,
+    current_user: Principal = Depends(get_current_principal),
+):
+    """First `limit` comments for each post of a feed page (comma-separated ids), in one aggregation."""
+    ids = [i for i in dict.fromkeys(post_ids.split(",")) if i][:100]
+    limit = max(1, min(limit, 20))
+    # Comments of a soft-deleted post stay until the reaper runs; don't serve them
+    oids = [PydanticObjectId(i) for i in ids if PydanticObjectId.is_valid(i)]
+    live = [
+        str(doc["_id"])
+        async for doc in CommunityPost.get_motor_collection().find(
+            {"_id": {"$in": oids}, "deleted_at": None}, {"_id": 1}
+        )
+    ]
+    pipeline = [
+        {"$match": {"post_id": {"$in": live}}},
+        {"$sort": {"post_id": 1, "timestamp": 1, "_id": 1}},
+        {"$group": {"_id": "$post_id", "comments": {"$firstN": {"input": "$$ROOT", "n": limit}}}},
+    ]
+    groups = await CommunityComment.get_motor_collection().aggregate(pipeline).to_list(length=None)
+    result = {post_id: [] for post_id in ids}
+    for g in groups:
+        result[g["_id"]] = [
+            _comment_response(CommunityComment.model_validate(c)) for c in g["comments"]
+        ]
+    return result
 
 @router.get("/{post_id}/comments", response_model=List[CommentResponse])
-async def get_comments(post_id: str, current_user: User = Depends(get_current_user)):
-    comments = await CommunityComment.find(CommunityComment.post_id == post_id).sort("timestamp").to_list()
-    return [CommentResponse(
-        id=str(c.id),
-        post_id=c.post_id,
-        author_id=c.author_id,
-        author_name=c.author_name,
-        author_role=c.author_role,
-        content=c.content,
-        timestamp=c.timestamp
-    ) for c in comments]
+async def get_comments(
+    post_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Comment thread page, oldest first. The cursor for the next page is returned in X-Next-Cursor."""
+    if not PydanticObjectId.is_valid(post_id) or not await CommunityPost.get_motor_collection().count_documents(
+        {"_id": PydanticObjectId(post_id), "deleted_at": None}, limit=1
+    ):
+        raise HTTPException(status_code=404, detail="Post not found")
+    limit = max(1, min(limit, 200))
+    query = {"post_id": post_id}
+    if cursor:
+        # Threads read oldest first
+        query.update(keyset_filter(cursor, "timestamp", "$gt"))
+    comments = await CommunityComment.find(query).sort(
+        [("timestamp", 1), ("_id", 1)]
+    ).limit(limit).to_list()
+    if len(comments) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(comments[-1].timestamp, comments[-1].id)
+    return [_comment_response(c) for c in comments]
 
 @router.post("/{post_id}/comments", response_model=CommentResponse)
 async def create_comment(post_id: str, body: CommentCreate, current_user: User = Depends(get_current_user)):
-    post = await CommunityPost.get(post_id)
-    if not post:
+    if not PydanticObjectId.is_valid(post_id):
         raise HTTPException(status_code=404, detail="Post not found")
-    
+    posts = CommunityPost.get_motor_collection()
+    oid = PydanticObjectId(post_id)
+
+    # Atomic $inc doubles as the existence check; no read-modify-write of the post
+    counted = await posts.update_one({"_id": oid, "deleted_at": None}, {"$inc": {"comments_count": 1}})
+    if not counted.matched_count:
+        raise HTTPException(status_code=404, detail="Post not found")
+
     comment = CommunityComment(
         post_id=post_id,
         author_id=str(current_user.id),
@@ -167,24 +243,16 @@ async def create_comment(post_id: str, body: CommentCreate, current_user: User =
         author_role=current_user.role,
         content=body.content
     )
-    await comment.insert()
-    
-    # Increment comment count
-    post.comments_count += 1
-    await post.save()
-    
-    return CommentResponse(
-        id=str(comment.id),
-        post_id=comment.post_id,
-        author_id=comment.author_id,
-        author_name=comment.author_name,
-        author_role=comment.author_role,
-        content=comment.content,
-        timestamp=comment.timestamp
-    )
+    try:
+        await comment.insert()
+    except Exception:
+        await posts.update_one({"_id": oid}, {"$inc": {"comments_count": -1}})
+        raise
+
+    return _comment_response(comment)
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_post(post_id: str, current_user: User = Depends(get_current_user)):
+async def delete_post(post_id: str, current_user: Principal = Depends(get_current_principal)):
     # Attempt to find the post using explicit PydanticObjectId conversion
     try:
         if PydanticObjectId.is_valid(post_id):
@@ -194,31 +262,16 @@ async def delete_post(post_id: str, current_user: User = Depends(get_current_use
     except Exception:
         post = await CommunityPost.get(post_id)
 
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Post not found")
-    
+
     if post.author_id != str(current_user.id):
         raise HTTPException(status_code=403, detail="Not authorized to delete this post")
-    
-    # Delete associated comments
-    await CommunityComment.find(CommunityComment.post_id == post_id).delete()
-    
-    # Delete media files from disk if they exist
-    if post.has_image and post.image_url:
-        img_path = post.image_url.lstrip("/")
-        if os.path.exists(img_path):
-            try:
-                os.remove(img_path)
-            except Exception as e:
-                print(f"Error removing image file: {e}")
-                
-    if post.has_file and post.file_url:
-        file_path = post.file_url.lstrip("/")
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as e:
-                print(f"Error removing document file: {e}")
-
-    await post.delete()
+
+    # Hidden right away; comments, reactions and media are reaped in the background
+    if post.deleted_at is None:
+        await CommunityPost.get_motor_collection().update_one(
+            {"_id": post.id, "deleted_at": None}, {"$set": {"deleted_at": datetime.utcnow()}}
+        )
+        wake_reaper()
     return None
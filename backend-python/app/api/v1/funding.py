@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from app.models.user import User
 from app.models.schemas import CapTableRequest
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_principal, Principal, invalidate_user
 from app.services.cap_table_service import simulate_cap_table
 from app.services.mca_service import mock_verify_startup
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/funding", tags=["funding"])
 
 
 @router.post("/cap-table")
-async def cap_table(body: CapTableRequest, user: User = Depends(get_current_user)):
+async def cap_table(body: CapTableRequest, user: Principal = Depends(get_current_principal)):
     result = simulate_cap_table(body.founder_equity, body.rounds)
     return result
 
@@ -18,6 +18,7 @@ async def cap_table(body: CapTableRequest, user: User = Depends(get_current_user
 async def vetting(company_name: str, user: User = Depends(get_current_user)):
     result = mock_verify_startup(company_name)
     if result["verified"] and not user.vetting_badge:
-        user.vetting_badge = True
-        await user.save()
+        # Targeted $set: the cached user may be stale, so never save() the whole document
+        await User.find_one(User.id == user.id).update({"$set": {"vetting_badge": True}})
+        invalidate_user(user.id)
     return result
@@ -1,35 +1,186 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.models.user import User
-from app.models.job import Job
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import Optional
+from datetime import datetime
+from beanie import PydanticObjectId
+from beanie.operators import In
+from app.models.user import User, UserSearchView
+from app.models.job import Job, normalize_key
 from app.models.schemas import JobCreate
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_principal, Principal
+from app.api.v1.pagination import encode_cursor, keyset_filter
+from app.services.matching_service import job_index, user_index, index_job, profile_tokens
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+_FACET_SIZE = 10
 
-@router.get("/")
-async def list_jobs(skip: int = 0, limit: int = 20, role_type: str = None):
-    query = Job.find(Job.is_active == True)
+
+def _search_filter(
+    role_type: Optional[str],
+    skills: Optional[str],
+    location: Optional[str],
+    min_equity: Optional[float],
+    max_equity: Optional[float],
+    min_pay: Optional[float],
+    max_pay: Optional[float],
+    since: Optional[datetime],
+    before: Optional[datetime],
+) -> dict:
+    """Mongo filter for the job search parameters (skills is comma-separated, all must match)."""
+    query: dict = {"is_active": True}
     if role_type:
-        query = Job.find(Job.role_type == role_type, Job.is_active == True)
-    jobs = await query.sort(-Job.created_at).skip(skip).limit(limit).to_list()
+        query["role_type"] = role_type
+    skill_keys = [k for k in map(normalize_key, (skills or "").split(",")) if k]
+    if len(skill_keys) == 1:
+        query["skill_keys"] = skill_keys[0]
+    elif skill_keys:
+        query["skill_keys"] = {"$all": skill_keys}
+    if location:
+        query["location_key"] = normalize_key(location)
+    for field, low, high in (("equity_offer", min_equity, max_equity), ("base_pay", min_pay, max_pay)):
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            query[field] = bounds
+    # Range on the indexed created_at, e.g. "posted in the last week"
+    created = {}
+    if since:
+        created["$gte"] = since
+    if before:
+        created["$lt"] = before
+    if created:
+        query["created_at"] = created
+    return query
+
+
+@router.get("/")
+async def list_jobs(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    role_type: str = None,
+    skills: Optional[str] = None,
+    location: Optional[str] = None,
+    min_equity: Optional[float] = None,
+    max_equity: Optional[float] = None,
+    min_pay: Optional[float] = None,
+    max_pay: Optional[float] = None,
+    since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+):
+    """Active jobs, newest first. The cursor for the next page is returned in X-Next-Cursor."""
+    limit = max(1, min(limit, 100))
+    query = _search_filter(role_type, skills, location, min_equity, max_equity, min_pay, max_pay, since, before)
+    if cursor:
+        query = {"$and": [query, keyset_filter(cursor, "created_at")]}
+    jobs = await Job.find(query).sort([("created_at", -1), ("_id", -1)]).limit(limit).to_list()
+    if len(jobs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(jobs[-1].created_at, jobs[-1].id)
     return [_serialize(j) for j in jobs]
 
 
+@router.get("/facets")
+async def job_facets(
+    role_type: str = None,
+    skills: Optional[str] = None,
+    location: Optional[str] = None,
+    min_equity: Optional[float] = None,
+    max_equity: Optional[float] = None,
+    min_pay: Optional[float] = None,
+    max_pay: Optional[float] = None,
+    since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+):
+    """Match total plus counts per role type, top skills and top locations, in one $facet."""
+    query = _search_filter(role_type, skills, location, min_equity, max_equity, min_pay, max_pay, since, before)
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "role_type": [{"$sortByCount": "$role_type"}],
+            "skills": [
+                {"$unwind": "$skill_keys"},
+                {"$sortByCount": "$skill_keys"},
+                {"$limit": _FACET_SIZE},
+            ],
+            "location": [
+                {"$group": {"_id": "$location_key", "label": {"$first": "$location"}, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": _FACET_SIZE},
+            ],
+        }},
+    ]
+    result = (await Job.get_motor_collection().aggregate(pipeline).to_list(length=1))[0]
+    return {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "role_type": [{"value": f["_id"], "count": f["count"]} for f in result["role_type"]],
+        "skills": [{"value": f["_id"], "count": f["count"]} for f in result["skills"]],
+        "location": [{"value": f["label"], "count": f["count"]} for f in result["location"]],
+    }
+
+
+@router.get("/recommended")
+async def recommended_jobs(limit: int = 10, user: Principal = Depends(get_current_principal)):
+    """Active jobs ranked by skill overlap with the caller's profile (bio/company terms)."""
+    matches = job_index.top(profile_tokens(user.id), max(1, min(limit, 50)), exclude_owner=user.id)
+    if not matches:
+        return []
+    jobs = {
+        str(j.id): j
+        for j in await Job.find(In(Job.id, [PydanticObjectId(doc_id) for doc_id, _, _ in matches])).to_list()
+    }
+    return [
+        {**_serialize(jobs[doc_id]), "match_score": score, "matched_terms": terms}
+        for doc_id, score, terms in matches
+        if doc_id in jobs and jobs[doc_id].is_active
+    ]
+
+
 @router.post("/")
 async def create_job(body: JobCreate, user: User = Depends(get_current_user)):
     job = Job(**body.model_dump(), posted_by=user.id, poster_name=user.name)
     await job.insert()
+    index_job(job)
     return _serialize(job)
 
 
+@router.get("/{job_id}/candidates")
+async def job_candidates(job_id: str, limit: int = 10, user: Principal = Depends(get_current_principal)):
+    """Users whose profiles best match the job's skills; visible to the poster only."""
+    job = await Job.get(job_id)
+    if not job or job.posted_by != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    matches = user_index.top(job_index.tokens(job.id), max(1, min(limit, 50)), exclude_owner=user.id)
+    if not matches:
+        return []
+    ids = [PydanticObjectId(doc_id) for doc_id, _, _ in matches]
+    users = {str(u.id): u for u in await User.find(In(User.id, ids)).project(UserSearchView).to_list()}
+    return [
+        {
+            "id": doc_id,
+            "name": users[doc_id].name,
+            "role": users[doc_id].role,
+            "company": users[doc_id].company,
+            "avatar_url": users[doc_id].avatar_url,
+            "match_score": score,
+            "matched_terms": terms,
+        }
+        for doc_id, score, terms in matches
+        if doc_id in users
+    ]
+
+
 @router.delete("/{job_id}")
-async def delete_job(job_id: str, user: User = Depends(get_current_user)):
+async def delete_job(job_id: str, user: Principal = Depends(get_current_principal)):
     job = await Job.get(job_id)
     if not job or job.posted_by != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
     job.is_active = False
     await job.save()
+    index_job(job)
     return {"message": "Job closed"}
 
 
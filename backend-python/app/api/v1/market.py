@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.models.user import User
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import Optional
+from datetime import datetime
 from app.models.market import MarketAlert, NewsArticle
 from app.models.schemas import AlertCreate
-from app.auth import get_current_user
-from app.services.market_service import get_market_snapshot, get_stocks_list
-from app.services.news_scraper import get_cached_news
-from app.services.sentiment_service import get_market_sentiment_score
+from app.auth import get_current_principal, Principal
+from app.services.market_service import get_market_snapshot, get_stocks_list, get_history, INTERVALS
+from app.services.news_scraper import get_cached_news, news_version
+from app.services.sentiment_service import get_market_sentiment_score, sentiment_version
+from app.services.materialized import MaterializedResponse
+from app.services.alert_engine import alert_created, alert_deleted
 
 router = APIRouter(prefix="/market", tags=["market"])
 
+# Serialized once per ingestion / window update, not per request
+_news_view = MaterializedResponse()
+_sentiment_view = MaterializedResponse()
+
 
 @router.get("/snapshot")
 async def market_snapshot():
@@ -21,42 +28,69 @@ async def stocks():
     return get_stocks_list()
 
 
+@router.get("/history/{ticker}")
+async def history(ticker: str, interval: str = "1m", limit: int = 500):
+    """Intraday OHLC candles served from the in-memory tick store."""
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(INTERVALS)}")
+    candles = get_history(ticker, interval, limit)
+    if candles is None:
+        raise HTTPException(status_code=404, detail="Unknown ticker")
+    return {"ticker": ticker.upper(), "interval": interval, "candles": candles}
+
+
+def _news_item(a: dict) -> dict:
+    # Cached articles are model dumps; mock articles have no id or score yet
+    return {
+        "id": str(a["id"]) if a.get("id") else "mock",
+        "title": a.get("title"),
+        "url": a.get("url"),
+        "source": a.get("source"),
+        "summary": a.get("summary"),
+        "image_url": a.get("image_url"),
+        "sentiment_score": a.get("sentiment_score", 0.0),
+        "sentiment_label": a.get("sentiment_label", "neutral"),
+        "published_at": a.get("published_at"),
+    }
+
+
 @router.get("/news")
-async def news(limit: int = 20):
+async def news(request: Request, limit: int = 20):
     articles = await get_cached_news()
-    # If the service returns mock dicts or Beanie models, handle both
-    result = []
-    for a in articles[:limit]:
-        if isinstance(a, dict):
-            result.append({
-                "id": a.get("id", "mock"),
-                "title": a.get("title"),
-                "url": a.get("url"),
-                "source": a.get("source"),
-                "summary": a.get("summary"),
-                "image_url": a.get("image_url"),
-                "sentiment_score": a.get("sentiment_score", 0.0),
-                "sentiment_label": a.get("sentiment_label", "neutral"),
-                "published_at": a.get("published_at"),
-            })
-        else: # Beanie model
-            result.append({
-                "id": str(a.id),
-                "title": a.title,
-                "url": a.url,
-                "source": a.source,
-                "summary": a.summary,
-                "image_url": a.image_url,
-                "sentiment_score": a.sentiment_score,
-                "sentiment_label": a.sentiment_label,
-                "published_at": a.published_at,
-            })
-    return result
+    limit = max(0, min(limit, len(articles)))
+    return _news_view.respond(
+        request, news_version(), lambda: [_news_item(a) for a in articles[:limit]], key=limit
+    )
 
 
-@router.get("/sentiment")
-async def sentiment():
-    score = await get_market_sentiment_score()
+@router.get("/news/archive")
+async def news_archive(since: Optional[datetime] = None, before: Optional[datetime] = None, limit: int = 20):
+    """Stored articles in a scraped_at window, newest first (index range scan)."""
+    query = NewsArticle.find()
+    if since:
+        query = query.find(NewsArticle.scraped_at >= since)
+    if before:
+        query = query.find(NewsArticle.scraped_at < before)
+    articles = await query.sort(-NewsArticle.scraped_at).limit(max(1, min(limit, 100))).to_list()
+    return [
+        {
+            "id": str(a.id),
+            "title": a.title,
+            "url": a.url,
+            "source": a.source,
+            "summary": a.summary,
+            "image_url": a.image_url,
+            "sentiment_score": a.sentiment_score,
+            "sentiment_label": a.sentiment_label,
+            "published_at": a.published_at,
+            "scraped_at": a.scraped_at,
+        }
+        for a in articles
+    ]
+
+
+def _sentiment_body() -> dict:
+    score = get_market_sentiment_score()
     label = "bullish" if score > 0.2 else "bearish" if score < -0.2 else "neutral"
     advice = (
         "Good time to raise funding — investor sentiment is positive."
@@ -68,8 +102,13 @@ async def sentiment():
     return {"score": score, "label": label, "advice": advice}
 
 
+@router.get("/sentiment")
+async def sentiment(request: Request):
+    return _sentiment_view.respond(request, sentiment_version(), _sentiment_body)
+
+
 @router.post("/alerts")
-async def create_alert(body: AlertCreate, user: User = Depends(get_current_user)):
+async def create_alert(body: AlertCreate, user: Principal = Depends(get_current_principal)):
     alert = MarketAlert(
         user_id=user.id,
         ticker=body.ticker.upper(),
@@ -77,11 +116,12 @@ async def create_alert(body: AlertCreate, user: User = Depends(get_current_user)
         direction=body.direction,
     )
     await alert.insert()
+    await alert_created(alert)
     return {"message": "Alert created", "id": str(alert.id)}
 
 
 @router.get("/alerts")
-async def get_alerts(user: User = Depends(get_current_user)):
+async def get_alerts(user: Principal = Depends(get_current_principal)):
     alerts = await MarketAlert.find(MarketAlert.user_id == user.id).to_list()
     return [
         {
@@ -97,9 +137,10 @@ async def get_alerts(user: User = Depends(get_current_user)):
 
 
 @router.delete("/alerts/{alert_id}")
-async def delete_alert(alert_id: str, user: User = Depends(get_current_user)):
+async def delete_alert(alert_id: str, user: Principal = Depends(get_current_principal)):
     alert = await MarketAlert.get(alert_id)
     if not alert or alert.user_id != user.id:
         raise HTTPException(status_code=404, detail="Alert not found")
     await alert.delete()
+    await alert_deleted(alert_id)
     return {"message": "Alert deleted"}
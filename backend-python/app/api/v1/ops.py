@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.counter_buffer import counter_buffer
+from app.auth import principal_cache, password_pool_stats
+from app.services.news_scraper import ingestion_stats
+from app.services.sentiment_service import sentiment_stats
+from app.services.scheduler import scheduler
+from app.services.post_reaper import reaper_stats
+from app.services.matching_service import matching_stats
+
+router = APIRouter(prefix="/ops", tags=["ops"])
+
+
+@router.get("/livez")
+async def livez():
+    """Liveness: the process is up and its event loop is serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: required warmups finished; 503 with warmup state until then."""
+    status = scheduler.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@router.get("/metrics")
+async def metrics():
+    """In-process runtime metrics for this replica."""
+    return {
+        "counter_buffer": counter_buffer.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_pool": password_pool_stats(),
+        "news_ingestion": ingestion_stats(),
+        "sentiment": sentiment_stats(),
+        "post_reaper": reaper_stats(),
+        "matching_index": matching_stats(),
+    }
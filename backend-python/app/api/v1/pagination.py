@@ -0,0 +1,29 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+A cursor is "<sort value>_<ObjectId>" of the last row on a page; the next
+page is everything strictly after it in (field, _id) order, which the
+matching compound index serves as a single range read at any depth.
+Handlers return the next cursor in the X-Next-Cursor header.
+"""
+from datetime import datetime
+from typing import Any, Callable
+from beanie import PydanticObjectId
+from fastapi import HTTPException
+
+
+def encode_cursor(value: Any, oid: PydanticObjectId) -> str:
+    value = value.isoformat() if isinstance(value, datetime) else repr(value)
+    return f"{value}_{oid}"
+
+
+def keyset_filter(
+    cursor: str, field: str, op: str = "$lt", parse: Callable[[str], Any] = datetime.fromisoformat
+) -> dict:
+    """Filter for rows strictly after `cursor`: `$lt` for descending order, `$gt` for ascending."""
+    try:
+        value, _, oid = cursor.rpartition("_")
+        value, oid = parse(value), PydanticObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [{field: {op: value}}, {field: value, "_id": {op: oid}}]}
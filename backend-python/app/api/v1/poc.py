@@ -1,21 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import Optional
+from datetime import datetime
 from beanie import PydanticObjectId
 from app.models.user import User
 from app.models.poc import POC
+from app.models.reaction import Reaction
 from app.models.schemas import POCCreate
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_principal, Principal
+from app.services.reaction_service import toggle_reaction
+from app.services.counter_buffer import counter_buffer
+from beanie.operators import In
+from app.services.matching_service import poc_index, index_poc, profile_tokens
+from app.api.v1.pagination import encode_cursor, keyset_filter
 
 router = APIRouter(prefix="/pocs", tags=["pocs"])
 
+# sort name -> (field, cursor value parser)
+_SORTS = {
+    "hot": ("hot_score", float),
+    "top": ("upvotes", float),
+    "new": ("created_at", datetime.fromisoformat),
+}
+
 
 @router.get("/")
-async def list_pocs(skip: int = 0, limit: int = 20, tag: str = None, stage: str = None):
-    query = POC.find()
+async def list_pocs(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    sort: str = "hot",
+    tag: str = None,
+    stage: str = None,
+    since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+):
+    """POCs by hot score (default), upvotes or recency; tag and stage filters combine.
+
+    The cursor for the next page is returned in X-Next-Cursor.
+    """
+    if sort not in _SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(_SORTS)}")
+    field, parse = _SORTS[sort]
+    limit = max(1, min(limit, 100))
+    query: dict = {}
     if tag:
-        query = POC.find({"tags": tag})
+        query["tags"] = tag
     if stage:
-        query = POC.find(POC.stage == stage)
-    pocs = await query.sort(-POC.upvotes).skip(skip).limit(limit).to_list()
+        query["stage"] = stage
+    created = {}
+    if since:
+        created["$gte"] = since
+    if before:
+        created["$lt"] = before
+    if created:
+        query["created_at"] = created
+    if cursor:
+        query = {"$and": [query, keyset_filter(cursor, field, parse=parse)]}
+    pocs = await POC.find(query).sort([(field, -1), ("_id", -1)]).limit(limit).to_list()
+    if len(pocs) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(getattr(pocs[-1], field), pocs[-1].id)
     return [_serialize(p) for p in pocs]
 
 
@@ -27,9 +70,27 @@ async def create_poc(body: POCCreate, user: User = Depends(get_current_user)):
         author_name=user.name,
     )
     await poc.insert()
+    index_poc(poc)
     return _serialize(poc)
 
 
+@router.get("/recommended")
+async def recommended_pocs(limit: int = 10, user: Principal = Depends(get_current_principal)):
+    """POCs ranked by tag overlap with the caller's profile (bio/company terms)."""
+    matches = poc_index.top(profile_tokens(user.id), max(1, min(limit, 50)), exclude_owner=user.id)
+    if not matches:
+        return []
+    pocs = {
+        str(p.id): p
+        for p in await POC.find(In(POC.id, [PydanticObjectId(doc_id) for doc_id, _, _ in matches])).to_list()
+    }
+    return [
+        {**_serialize(pocs[doc_id]), "match_score": score, "matched_terms": terms}
+        for doc_id, score, terms in matches
+        if doc_id in pocs
+    ]
+
+
 @router.get("/{poc_id}")
 async def get_poc(poc_id: str):
     poc = await POC.get(poc_id)
@@ -39,28 +100,25 @@ async def get_poc(poc_id: str):
 
 
 @router.post("/{poc_id}/upvote")
-async def upvote_poc(poc_id: str, user: User = Depends(get_current_user)):
-    poc = await POC.get(poc_id)
-    if not poc:
+async def upvote_poc(poc_id: str, user: Principal = Depends(get_current_principal)):
+    if not PydanticObjectId.is_valid(poc_id):
+        raise HTTPException(status_code=404, detail="POC not found")
+    result = await toggle_reaction(POC, "poc", PydanticObjectId(poc_id), str(user.id), "upvotes")
+    if result is None:
         raise HTTPException(status_code=404, detail="POC not found")
-    if user.id in poc.upvoted_by:
-        poc.upvotes -= 1
-        poc.upvoted_by.remove(user.id)
-        action = "removed"
-    else:
-        poc.upvotes += 1
-        poc.upvoted_by.append(user.id)
-        action = "added"
-    await poc.save()
-    return {"upvotes": poc.upvotes, "action": action}
+    upvotes, upvoted = result
+    return {"upvotes": upvotes, "action": "added" if upvoted else "removed"}
 
 
 @router.delete("/{poc_id}")
-async def delete_poc(poc_id: str, user: User = Depends(get_current_user)):
+async def delete_poc(poc_id: str, user: Principal = Depends(get_current_principal)):
     poc = await POC.get(poc_id)
     if not poc or poc.author_id != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
     await poc.delete()
+    # Document first: a toggle racing this delete finds no target and cleans up after itself
+    await Reaction.get_motor_collection().delete_many({"target_type": "poc", "target_id": poc.id})
+    poc_index.remove(poc.id)
     return {"message": "Deleted"}
 
 
@@ -72,7 +130,8 @@ def _serialize(p: POC) -> dict:
         "tags": p.tags,
         "author_id": str(p.author_id),
         "author_name": p.author_name,
-        "upvotes": p.upvotes,
+        "upvotes": p.upvotes + counter_buffer.pending(POC, "upvotes", p.id),
+        "hot_score": round(p.hot_score, 6),
         "demo_url": p.demo_url,
         "github_url": p.github_url,
         "stage": p.stage,
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.models.schedule import Schedule
-from app.models.user import User
 from app.models.schemas import ScheduleCreate, ScheduleResponse
-from app.api.v1.auth import get_current_user
+from app.auth import get_current_principal, Principal
 from typing import List
 from beanie import PydanticObjectId
 
@@ -10,7 +9,7 @@ router = APIRouter(prefix="/schedule", tags=["Schedule"])
 
 @router.get("/", response_model=List[ScheduleResponse])
 async def get_schedules(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     results = await Schedule.find(Schedule.user_id == str(current_user.id)).to_list()
     return results
@@ -18,7 +17,7 @@ async def get_schedules(
 @router.post("/", response_model=ScheduleResponse)
 async def create_schedule(
     schedule_in: ScheduleCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     new_schedule = Schedule(
         user_id=str(current_user.id),
@@ -31,7 +30,7 @@ async def create_schedule(
 @router.patch("/{schedule_id}/toggle", response_model=ScheduleResponse)
 async def toggle_schedule(
     schedule_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     schedule = await Schedule.find_one(
         Schedule.id == PydanticObjectId(schedule_id), 
@@ -47,7 +46,7 @@ async def toggle_schedule(
 @router.delete("/{schedule_id}")
 async def delete_schedule(
     schedule_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     schedule = await Schedule.find_one(
         Schedule.id == PydanticObjectId(schedule_id), 
@@ -1,7 +1,13 @@
 import os
+import time
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pydantic import BaseModel
+from beanie import PydanticObjectId
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.models.user import User
@@ -9,10 +15,20 @@ from app.models.user import User
 SECRET_KEY = os.getenv("JWT_SECRET", "founderhq-super-secret-key-2024")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))  # seconds
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "4"))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "32"))  # waiting jobs before 503
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost factor report needs_update and are rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 bearer_scheme = HTTPBearer()
 
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
+_password_jobs = 0  # running + queued
+
 
 def hash_password(password: str) -> str:
     # bcrypt has a hard 72-byte limit — truncate conservatively
@@ -31,25 +47,191 @@ def verify_password(plain: str, hashed: str) -> bool:
         return False
 
 
+def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify a password; also returns a new hash if the stored one uses outdated settings."""
+    try:
+        safe_plain = plain.encode("utf-8")[:70].decode("utf-8", errors="ignore")
+        return pwd_context.verify_and_update(safe_plain, hashed)
+    except Exception as e:
+        print(f"Password verification error: {e}")
+        return False, None
+
+
+async def _run_password_job(fn, *args):
+    global _password_jobs
+    if _password_jobs >= PASSWORD_WORKERS + PASSWORD_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_pool, fn, *args)
+    finally:
+        _password_jobs -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_job(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run_password_job(verify_and_update_password, plain, hashed)
+
+
+def password_pool_stats() -> dict:
+    return {"workers": PASSWORD_WORKERS, "queue_limit": PASSWORD_QUEUE_LIMIT, "in_flight": _password_jobs}
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     to_encode["exp"] = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-) -> User:
-    token = credentials.credentials
+def create_user_token(user: User) -> str:
+    # name/role ride along so claims-only endpoints never need the User document
+    return create_access_token({"sub": str(user.id), "name": user.name, "role": user.role})
+
+
+def _decode_token(token: str) -> dict | None:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     except JWTError:
+        return None
+    return payload if payload.get("sub") else None
+
+
+def decode_token_subject(token: str) -> str | None:
+    """Return the user id a token was issued for, or None if it is invalid."""
+    payload = _decode_token(token)
+    return payload["sub"] if payload else None
+
+
+class _PrincipalCache:
+    """Bounded LRU of User documents with a TTL, keyed by user id."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._miss_seconds = 0.0
+
+    def get(self, user_id: str) -> User | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires, user = entry
+        if expires < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def put(self, user_id: str, user: User):
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str):
+        if self._entries.pop(str(user_id), None) is not None:
+            self.invalidations += 1
+
+    async def load(self, user_id: str) -> User | None:
+        user = self.get(user_id)
+        if user is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            started = time.perf_counter()
+            user = await User.get(user_id)
+            self._miss_seconds += time.perf_counter() - started
+            if user is None:
+                return None
+            self.put(user_id, user)
+        # Handlers mutate and save() the user they get; never hand out the cached instance
+        return user.model_copy()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "avg_miss_ms": round(self._miss_seconds * 1000 / self.misses, 3) if self.misses else 0.0,
+        }
+
+
+principal_cache = _PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_user(user_id) -> None:
+    """Drop a user from the principal cache after their document changes."""
+    principal_cache.invalidate(str(user_id))
+
+
+class Principal(BaseModel):
+    """Claims-only identity for endpoints that need nothing beyond id, name and role."""
+    id: PydanticObjectId
+    name: str | None = None
+    role: str | None = None
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> User:
+    user_id = decode_token_subject(credentials.credentials)
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    user = await principal_cache.load(user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
+
+
+async def get_current_user_fresh(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> User:
+    """The caller's User read straight from Mongo, for handlers that save() it.
+
+    save() replaces the whole document, so it must start from the current
+    one rather than a cached copy up to PRINCIPAL_CACHE_TTL old that may
+    predate writes made on another replica.
+    """
+    user_id = decode_token_subject(credentials.credentials)
+    if not user_id or not PydanticObjectId.is_valid(user_id):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
     user = await User.get(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
+
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> Principal:
+    """Resolve the caller from the token alone, without touching Mongo.
+
+    Older tokens without name/role claims fall back to the cached User.
+    """
+    payload = _decode_token(credentials.credentials)
+    if not payload or not PydanticObjectId.is_valid(payload["sub"]):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    if "name" in payload and "role" in payload:
+        return Principal(id=payload["sub"], name=payload["name"], role=payload["role"])
+    user = await principal_cache.load(payload["sub"])
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return Principal(id=user.id, name=user.name, role=user.role)
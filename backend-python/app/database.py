@@ -4,19 +4,46 @@ from beanie import init_beanie
 from app.models.user import User
 from app.models.poc import POC
 from app.models.job import Job
-from app.models.market import MarketAlert, NewsArticle
+from app.models.market import MarketAlert, NewsArticle, PriceCandle
 from app.models.community import CommunityPost, CommunityComment
 from app.models.schedule import Schedule
+from app.models.reaction import Reaction
+from app.models.blob import Blob
 from dotenv import load_dotenv
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "founderhq")
+# Opt-in: drop indexes that are no longer declared in any model's Settings.indexes.
+# Off by default so a rolling deploy never drops an index older replicas still query.
+DROP_UNDECLARED_INDEXES = os.getenv("DROP_UNDECLARED_INDEXES", "false").lower() == "true"
 
 client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL)
 
+
+async def _email_index_buildable(db) -> bool:
+    """False when existing users would make the unique email index build fail."""
+    users = db[User.Settings.name]
+    if "email_unique" in await users.index_information():
+        return True
+    duplicates = await users.aggregate([
+        {"$group": {"_id": {"$toLower": "$email"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+        {"$limit": 1},
+    ], allowDiskUse=True).to_list(length=1)
+    return not duplicates
+
+
 async def init_db():
+    db = client[DB_NAME]
+    if not await _email_index_buildable(db):
+        # Booting without the index beats crash-looping on DuplicateKeyError
+        print("Duplicate user emails found; skipping email_unique. Run: python -m app.migrations.email_unique")
+        User.Settings.indexes = [i for i in User.Settings.indexes if i.document["name"] != "email_unique"]
+    # Beanie creates every declared index and, with allow_index_dropping,
+    # removes stale ones, so the collections always match the models
     await init_beanie(
-        database=client[DB_NAME],
-        document_models=[User, POC, Job, MarketAlert, NewsArticle, CommunityPost, CommunityComment, Schedule],
+        database=db,
+        document_models=[User, POC, Job, MarketAlert, NewsArticle, PriceCandle, CommunityPost, CommunityComment, Schedule, Reaction, Blob],
+        allow_index_dropping=DROP_UNDECLARED_INDEXES,
     )
@@ -0,0 +1,22 @@
+"""
+Recount `CommunityPost.likes_count` and `POC.upvotes` from the `reactions`
+collection.
+
+Buffered counter deltas are lost if a process is killed before it flushes;
+this resets the counters to match the reaction rows. The app runs the
+same recount every COUNTER_RECOUNT_SECONDS when that is set.
+Idempotent; run with: python -m app.migrations.counters
+"""
+import asyncio
+from app.database import init_db
+from app.services.reaction_service import recount_counters
+
+
+async def main():
+    await init_db()
+    corrected = await recount_counters()
+    print(f"Corrected {corrected['likes_count']} post like counts and {corrected['upvotes']} POC upvote counts")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
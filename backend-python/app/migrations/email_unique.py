@@ -0,0 +1,50 @@
+"""
+Prepare `users` for the unique, lowercased email index.
+
+Lowercases every stored email that does not collide with another account,
+then lists the accounts that do (same address up to case, or exact
+duplicates). Those must be merged or renamed by hand: each one may own
+POCs, posts and jobs. Until none are left, init_db boots without the
+`email_unique` index. Exits non-zero while conflicts remain.
+
+Idempotent; run with: python -m app.migrations.email_unique
+"""
+import asyncio
+import sys
+from app.database import init_db
+from app.models.user import User
+
+
+async def main() -> int:
+    await init_db()
+    collection = User.get_motor_collection()
+    conflicts = await collection.aggregate([
+        {"$group": {
+            "_id": {"$toLower": "$email"},
+            "ids": {"$push": "$_id"},
+            "emails": {"$push": "$email"},
+            "n": {"$sum": 1},
+        }},
+        {"$match": {"n": {"$gt": 1}}},
+    ], allowDiskUse=True).to_list(length=None)
+    conflicting = [user_id for group in conflicts for user_id in group["ids"]]
+
+    result = await collection.update_many(
+        {"email": {"$regex": "[A-Z]"}, "_id": {"$nin": conflicting}},
+        [{"$set": {"email": {"$toLower": "$email"}}}],
+    )
+    print(f"Lowercased {result.modified_count} emails")
+
+    for group in conflicts:
+        print(f"Conflict for {group['_id']}:")
+        for user_id, email in zip(group["ids"], group["emails"]):
+            print(f"  {user_id}  {email}")
+    if conflicts:
+        print(f"{len(conflicts)} conflicting addresses; resolve them and re-run, then restart the app")
+        return 1
+    print("No conflicts; email_unique is created on the next app start")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
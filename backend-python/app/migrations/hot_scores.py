@@ -0,0 +1,19 @@
+"""
+Backfill `POC.hot_score` for POCs created before hot ranking existed.
+
+The startup warmup does the same; this lets it run ahead of a deploy.
+Idempotent; run with: python -m app.migrations.hot_scores
+"""
+import asyncio
+from app.database import init_db
+from app.services.ranking_service import refresh_hot_scores
+
+
+async def main():
+    await init_db()
+    updated = await refresh_hot_scores()
+    print(f"Updated hot scores for {updated} POCs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
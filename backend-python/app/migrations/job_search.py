@@ -0,0 +1,35 @@
+"""
+Populate `Job.skill_keys` / `Job.location_key` for jobs posted before job search existed.
+
+Idempotent; run with: python -m app.migrations.job_search
+"""
+import asyncio
+from pymongo import UpdateOne
+from app.database import init_db
+from app.models.job import Job, normalize_key
+
+BATCH_SIZE = 1000
+
+
+async def main():
+    await init_db()
+    collection = Job.get_motor_collection()
+    ops, updated = [], 0
+    async for doc in collection.find({}, {"skills": 1, "location": 1}):
+        keys = list(dict.fromkeys(k for k in map(normalize_key, doc.get("skills") or []) if k))
+        ops.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"skill_keys": keys, "location_key": normalize_key(doc.get("location", "Remote"))}},
+        ))
+        if len(ops) >= BATCH_SIZE:
+            await collection.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    print(f"Updated search keys for {updated} jobs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""
+Move legacy `CommunityPost.likes` / `POC.upvoted_by` arrays into the
+`reactions` collection and set the denormalized counters from them.
+
+Idempotent: reactions are upserted and the arrays are unset once copied.
+Run with: python -m app.migrations.reactions
+"""
+import asyncio
+from datetime import datetime
+from pymongo import UpdateOne
+from app.database import init_db
+from app.models.community import CommunityPost
+from app.models.poc import POC
+from app.models.reaction import Reaction
+
+
+async def _migrate(target, target_type: str, array_field: str, counter: str) -> int:
+    collection = target.get_motor_collection()
+    reactions = Reaction.get_motor_collection()
+    migrated = 0
+    cursor = collection.find({f"{array_field}.0": {"$exists": True}}, {array_field: 1})
+    async for doc in cursor:
+        users = {str(u) for u in doc[array_field]}
+        ops = [
+            UpdateOne(
+                {"target_type": target_type, "target_id": doc["_id"], "user_id": uid},
+                {"$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True,
+            )
+            for uid in users
+        ]
+        await reactions.bulk_write(ops, ordered=False)
+        total = await reactions.count_documents({"target_type": target_type, "target_id": doc["_id"]})
+        await collection.update_one(
+            {"_id": doc["_id"]}, {"$set": {counter: total}, "$unset": {array_field: ""}}
+        )
+        migrated += 1
+    return migrated
+
+
+async def main():
+    await init_db()
+    posts = await _migrate(CommunityPost, "post", "likes", "likes_count")
+    pocs = await _migrate(POC, "poc", "upvoted_by", "upvotes")
+    print(f"Migrated reactions for {posts} posts and {pocs} POCs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
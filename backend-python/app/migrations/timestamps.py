@@ -0,0 +1,42 @@
+"""
+Repair creation timestamps written while the models used
+`= datetime.utcnow()` as a default, which froze the value at import time.
+
+A document's ObjectId embeds its real insert time, so any timestamp that
+trails it by more than TOLERANCE is replaced with the ObjectId time in one
+server-side pipeline update per collection. Idempotent.
+Run with: python -m app.migrations.timestamps
+"""
+import asyncio
+from app.database import init_db
+from app.models.job import Job
+from app.models.poc import POC
+from app.models.user import User
+from app.models.market import MarketAlert, NewsArticle
+
+TOLERANCE_MS = 60_000
+
+_TARGETS = [
+    (Job, "created_at"),
+    (POC, "created_at"),
+    (User, "created_at"),
+    (MarketAlert, "created_at"),
+    (NewsArticle, "scraped_at"),
+]
+
+
+async def main():
+    await init_db()
+    for model, field in _TARGETS:
+        result = await model.get_motor_collection().update_many(
+            {"$expr": {"$or": [
+                {"$eq": [{"$type": f"${field}"}, "missing"]},
+                {"$gt": [{"$subtract": [{"$toDate": "$_id"}, f"${field}"]}, TOLERANCE_MS]},
+            ]}},
+            [{"$set": {field: {"$toDate": "$_id"}}}],
+        )
+        print(f"{model.get_settings().name}.{field}: repaired {result.modified_count} documents")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
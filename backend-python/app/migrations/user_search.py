@@ -0,0 +1,34 @@
+"""
+Populate `User.search_terms` and `User.name_terms` for users created before
+prefix search existed.
+
+Idempotent; run with: python -m app.migrations.user_search
+"""
+import asyncio
+from pymongo import UpdateOne
+from app.database import init_db
+from app.models.user import User, search_tokens
+
+BATCH_SIZE = 1000
+
+
+async def main():
+    await init_db()
+    collection = User.get_motor_collection()
+    ops, updated = [], 0
+    async for doc in collection.find({}, {"name": 1, "company": 1, "role": 1}):
+        terms = search_tokens(doc.get("name"), doc.get("company"), doc.get("role"))
+        name_terms = search_tokens(doc.get("name"))
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_terms": terms, "name_terms": name_terms}}))
+        if len(ops) >= BATCH_SIZE:
+            await collection.bulk_write(ops, ordered=False)
+            updated += len(ops)
+            ops = []
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+        updated += len(ops)
+    print(f"Updated search terms for {updated} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,15 @@
+from beanie import Document
+from pydantic import Field
+from datetime import datetime
+
+
+class Blob(Document):
+    """One stored file, keyed by the SHA-256 of its content."""
+    id: str  # hex SHA-256
+    ext: str = ""  # extension of the first upload, kept so the file serves with a sensible type
+    size: int = 0
+    refcount: int = 0  # maintained with $inc by the blob store
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "blobs"
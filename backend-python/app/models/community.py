@@ -1,5 +1,6 @@
-from beanie import Document, Link
-from pydantic import Field
+from beanie import Document, Link, PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from typing import Optional, List
 from datetime import datetime
 from app.models.user import User
@@ -10,7 +11,7 @@ class CommunityPost(Document):
     author_role: str
     content: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
-    likes: List[str] = []  # List of user IDs who liked
+    likes_count: int = 0  # maintained with $inc; who liked lives in `reactions`
     comments_count: int = 0
     tags: List[str] = []
     has_image: bool = False
@@ -19,9 +20,56 @@ class CommunityPost(Document):
     has_file: bool = False
     file_name: Optional[str] = None
     file_url: Optional[str] = None
+    # Soft delete: hidden immediately, comments/reactions/media reaped in the background
+    deleted_at: Optional[datetime] = None
+    media_released: bool = False
 
     class Settings:
         name = "community_posts"
+        indexes = [
+            # Feed keyset pagination: newest first, _id breaks timestamp ties
+            IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="feed_timestamp_id"),
+            # Reaper scan for soft-deleted posts
+            IndexModel([("deleted_at", ASCENDING)], name="deleted_at"),
+        ]
+
+
+class CommunityPostView(BaseModel):
+    """Feed projection of a post."""
+    id: PydanticObjectId = Field(alias="_id")
+    author_id: str
+    author_name: str
+    author_role: str
+    content: str
+    timestamp: datetime
+    likes_count: int = 0
+    comments_count: int = 0
+    tags: List[str] = []
+    has_image: bool = False
+    image_alt: Optional[str] = None
+    image_url: Optional[str] = None
+    has_file: bool = False
+    file_name: Optional[str] = None
+    file_url: Optional[str] = None
+
+    class Settings:
+        projection = {
+            "_id": 1,
+            "author_id": 1,
+            "author_name": 1,
+            "author_role": 1,
+            "content": 1,
+            "timestamp": 1,
+            "likes_count": 1,
+            "comments_count": 1,
+            "tags": 1,
+            "has_image": 1,
+            "image_alt": 1,
+            "image_url": 1,
+            "has_file": 1,
+            "file_name": 1,
+            "file_url": 1,
+        }
 
 class CommunityComment(Document):
     post_id: str
@@ -33,3 +81,10 @@ class CommunityComment(Document):
 
     class Settings:
         name = "community_comments"
+        indexes = [
+            # Thread keyset pagination: oldest first, _id breaks timestamp ties
+            IndexModel(
+                [("post_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+                name="post_timestamp_id",
+            ),
+        ]
@@ -1,8 +1,15 @@
-from beanie import Document, PydanticObjectId
+from beanie import Document, PydanticObjectId, before_event, Insert, Replace, Save
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from typing import Optional, List
 from datetime import datetime
 
 
+def normalize_key(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a skill or location for exact-match filters."""
+    return " ".join((value or "").split()).casefold()
+
+
 class Job(Document):
     title: str
     company: str
@@ -15,7 +22,36 @@ class Job(Document):
     posted_by: PydanticObjectId
     poster_name: str
     is_active: bool = True
-    created_at: datetime = datetime.utcnow()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Normalized copies of skills / location; what the search filters and facets run on
+    skill_keys: List[str] = []
+    location_key: str = ""
+
+    @before_event(Insert, Replace, Save)
+    def refresh_search_keys(self):
+        self.skill_keys = list(dict.fromkeys(k for k in map(normalize_key, self.skills) if k))
+        self.location_key = normalize_key(self.location)
 
     class Settings:
         name = "jobs"
+        # Every search shape is equality on the leading keys, then the
+        # (created_at, _id) keyset order; equity/pay ranges filter the scan
+        indexes = [
+            IndexModel(
+                [("is_active", ASCENDING), ("role_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="active_role_created_id",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="active_created_id",
+            ),
+            # Multikey: one entry per skill
+            IndexModel(
+                [("is_active", ASCENDING), ("skill_keys", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="active_skill_created",
+            ),
+            IndexModel(
+                [("is_active", ASCENDING), ("location_key", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="active_location_created",
+            ),
+        ]
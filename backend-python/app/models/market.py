@@ -1,4 +1,6 @@
-from beanie import Document, PydanticObjectId
+from beanie import Document, PydanticObjectId, TimeSeriesConfig, Granularity
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from typing import Optional
 from datetime import datetime
 
@@ -10,22 +12,59 @@ class MarketAlert(Document):
     direction: str = "above"  # above | below
     is_active: bool = True
     triggered: bool = False
-    created_at: datetime = datetime.utcnow()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "market_alerts"
+        indexes = [
+            IndexModel([("user_id", ASCENDING)], name="user"),
+            # Alert engine startup load
+            IndexModel([("is_active", ASCENDING), ("triggered", ASCENDING)], name="active_untriggered"),
+        ]
 
 
 class NewsArticle(Document):
     title: str
     url: str
+    url_hash: Optional[str] = None  # sha256 of the normalized url, used for dedupe
     source: str
     summary: Optional[str] = None
     sentiment_score: float = 0.0  # -1 to 1
     sentiment_label: str = "neutral"  # positive | negative | neutral
     image_url: Optional[str] = None
     published_at: Optional[datetime] = None
-    scraped_at: datetime = datetime.utcnow()
+    scraped_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "news_articles"
+        indexes = [
+            IndexModel([("scraped_at", DESCENDING)], name="scraped_at"),
+            IndexModel(
+                [("url_hash", ASCENDING)],
+                name="url_hash_unique",
+                unique=True,
+                # Articles stored before dedupe existed have no hash
+                partialFilterExpression={"url_hash": {"$exists": True}},
+            ),
+        ]
+
+
+class PriceCandle(Document):
+    ticker: str
+    interval: str  # 1s | 1m | 5m | 1h
+    timestamp: datetime  # candle open time (UTC)
+    open: float
+    high: float
+    low: float
+    close: float
+
+    class Settings:
+        name = "price_candles"
+        timeseries = TimeSeriesConfig(
+            time_field="timestamp",
+            meta_field="ticker",
+            granularity=Granularity.minutes,
+        )
+        indexes = [
+            IndexModel([("ticker", ASCENDING), ("interval", ASCENDING), ("timestamp", ASCENDING)], name="ticker_interval_time"),
+        ]
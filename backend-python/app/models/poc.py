@@ -1,4 +1,5 @@
 from beanie import Document, PydanticObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import Field
 from typing import Optional, List
 from datetime import datetime
@@ -10,14 +11,30 @@ class POC(Document):
     tags: List[str] = []
     author_id: PydanticObjectId
     author_name: str
-    upvotes: int = 0
-    upvoted_by: List[PydanticObjectId] = []
+    upvotes: int = 0  # maintained with $inc; who upvoted lives in `reactions`
     demo_url: Optional[str] = None
     github_url: Optional[str] = None
     document_urls: List[str] = []
     stage: str = "idea"  # idea | prototype | mvp | funded
     seeking: str = "investment"  # investment | co-founder | mentorship
-    created_at: datetime = datetime.utcnow()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Time-decayed upvotes, maintained by the ranking service
+    hot_score: float = 0.0
 
     class Settings:
         name = "pocs"
+        # list_pocs: equality on tag and/or stage, then the (sort key, _id)
+        # keyset order, so every page is one index range read
+        indexes = [
+            IndexModel([("hot_score", DESCENDING), ("_id", DESCENDING)], name="hot_id"),
+            IndexModel([("tags", ASCENDING), ("hot_score", DESCENDING), ("_id", DESCENDING)], name="tags_hot_id"),
+            IndexModel([("stage", ASCENDING), ("hot_score", DESCENDING), ("_id", DESCENDING)], name="stage_hot_id"),
+            IndexModel(
+                [("stage", ASCENDING), ("tags", ASCENDING), ("hot_score", DESCENDING), ("_id", DESCENDING)],
+                name="stage_tags_hot_id",
+            ),
+            IndexModel([("upvotes", DESCENDING), ("_id", DESCENDING)], name="upvotes_id"),
+            IndexModel([("tags", ASCENDING), ("upvotes", DESCENDING), ("_id", DESCENDING)], name="tags_upvotes_id"),
+            IndexModel([("stage", ASCENDING), ("upvotes", DESCENDING), ("_id", DESCENDING)], name="stage_upvotes_id"),
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        ]
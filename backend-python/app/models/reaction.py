@@ -0,0 +1,22 @@
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime
+
+
+class Reaction(Document):
+    """One user's like/upvote on a target; counters live on the target document."""
+    target_type: str  # post | poc
+    target_id: PydanticObjectId
+    user_id: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "reactions"
+        indexes = [
+            IndexModel(
+                [("target_type", ASCENDING), ("target_id", ASCENDING), ("user_id", ASCENDING)],
+                name="target_user_unique",
+                unique=True,
+            ),
+        ]
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Optional
 from beanie import Document
 from pydantic import Field
+from pymongo import IndexModel, ASCENDING
 import uuid
 
 class Schedule(Document):
@@ -13,3 +14,6 @@ class Schedule(Document):
 
     class Settings:
         name = "schedules"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("timestamp", ASCENDING)], name="user_timestamp"),
+        ]
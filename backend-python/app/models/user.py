@@ -1,8 +1,32 @@
-from beanie import Document
-from pydantic import EmailStr
-from typing import Optional
+import re
+import unicodedata
+from beanie import Document, PydanticObjectId, before_event, Insert, Replace, Save
+from pydantic import BaseModel, EmailStr, Field
+from pymongo import IndexModel, ASCENDING
+from typing import Optional, List
 from datetime import datetime
 
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_email(email: str) -> str:
+    """Emails are stored and looked up lowercased so the unique index is case-insensitive."""
+    return email.strip().lower()
+
+
+def search_tokens(*texts: Optional[str]) -> List[str]:
+    """Lowercased, accent-folded word tokens used for prefix search."""
+    tokens = []
+    for text in texts:
+        if not text:
+            continue
+        folded = unicodedata.normalize("NFKD", text)
+        folded = "".join(c for c in folded if not unicodedata.combining(c)).casefold()
+        for token in _TOKEN_RE.findall(folded):
+            if token not in tokens:
+                tokens.append(token)
+    return tokens
+
 
 class User(Document):
     name: str
@@ -15,7 +39,30 @@ class User(Document):
     is_verified: bool = False
     vetting_badge: bool = False
     avatar_url: Optional[str] = None
-    created_at: datetime = datetime.utcnow()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Normalized name/company/role tokens; B-tree indexed for anchored prefix search
+    search_terms: List[str] = []
+    # Name tokens alone, so name matches are found before company/role matches
+    name_terms: List[str] = []
+
+    @before_event(Insert, Replace, Save)
+    def refresh_search_terms(self):
+        self.email = normalize_email(self.email)
+        self.search_terms = search_tokens(self.name, self.company, self.role)
+        self.name_terms = search_tokens(self.name)
 
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+            IndexModel([("search_terms", ASCENDING)], name="search_terms_prefix"),
+            IndexModel([("name_terms", ASCENDING)], name="name_terms_prefix"),
+        ]
+
+
+class UserSearchView(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    name: str
+    role: str = "founder"
+    company: Optional[str] = None
+    avatar_url: Optional[str] = None
@@ -0,0 +1,202 @@
+"""
+In-memory MarketAlert evaluation engine.
+
+Active alerts are loaded once at startup and indexed per ticker and
+direction in sorted threshold lists, so a price update finds every crossed
+alert with a bisect (O(log n + k)) instead of scanning the collection:
+- "above" alerts fire when price >= threshold -> a prefix of the sorted list
+- "below" alerts fire when price <= threshold -> a suffix of the sorted list
+
+Every replica keeps its own index, so changes travel over the price bus:
+the routers announce created and deleted alerts, and only the elected
+price producer evaluates ticks, persists what fired and announces it.
+Each replica then drops the fired alerts from its index and delivers them
+to its own sockets.
+"""
+from bisect import bisect_left, bisect_right
+from beanie import PydanticObjectId
+from beanie.operators import In
+from pydantic import BaseModel, Field
+from app.models.market import MarketAlert
+from app.services.price_bus import get_price_bus
+
+
+class _AlertRow(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: PydanticObjectId
+    ticker: str
+    threshold: float
+    direction: str = "above"
+
+
+class AlertEngine:
+    def __init__(self):
+        # (ticker, direction) -> sorted [(threshold, alert_id)]
+        self._index: dict[tuple[str, str], list[tuple[float, str]]] = {}
+        # alert_id -> (ticker, direction, threshold, user_id)
+        self._alerts: dict[str, tuple[str, str, float, str]] = {}
+        # Changes made while load() reads Mongo, replayed onto the fresh index
+        self._journal: list[tuple] | None = None
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    async def load(self):
+        """Build the index from every active, untriggered alert in Mongo.
+
+        The cursor yields to the event loop between batches while ticks keep
+        being evaluated, so the new index is built and sorted off to the
+        side and swapped in whole. Adds, removes and fired alerts seen in the
+        meantime are journaled and replayed onto it.
+        """
+        index: dict[tuple[str, str], list[tuple[float, str]]] = {}
+        alerts: dict[str, tuple[str, str, float, str]] = {}
+        self._journal = []
+        try:
+            rows = MarketAlert.find(
+                MarketAlert.is_active == True, MarketAlert.triggered == False
+            ).project(_AlertRow)
+            async for row in rows:
+                key = (row.ticker.upper(), row.direction)
+                alert_id = str(row.id)
+                alerts[alert_id] = (key[0], key[1], row.threshold, str(row.user_id))
+                index.setdefault(key, []).append((row.threshold, alert_id))
+            # One sort per list is cheaper than inserting a million rows one by one
+            for entries in index.values():
+                entries.sort()
+            journal = self._journal
+        finally:
+            self._journal = None
+        self._index, self._alerts = index, alerts
+        for op, *args in journal:
+            if op == "insert":
+                self._insert(*args)
+            else:
+                self.remove(*args)
+
+    def add(self, alert: MarketAlert):
+        if not alert.is_active or alert.triggered or alert.direction not in ("above", "below"):
+            return
+        self._insert(str(alert.id), alert.ticker.upper(), alert.direction, alert.threshold, str(alert.user_id))
+
+    def _insert(self, alert_id: str, ticker: str, direction: str, threshold: float, user_id: str):
+        if self._journal is not None:
+            self._journal.append(("insert", alert_id, ticker, direction, threshold, user_id))
+        if alert_id in self._alerts:
+            return
+        self._alerts[alert_id] = (ticker, direction, threshold, user_id)
+        entries = self._index.setdefault((ticker, direction), [])
+        entry = (threshold, alert_id)
+        entries.insert(bisect_left(entries, entry), entry)
+
+    def apply_event(self, event: dict) -> list[dict]:
+        """Apply an alert event from the price bus; returns fired alerts to deliver."""
+        kind = event.get("type")
+        if kind == "alert_added":
+            a = event["alert"]
+            if a["direction"] in ("above", "below"):
+                self._insert(a["id"], a["ticker"], a["direction"], a["threshold"], a["user_id"])
+        elif kind == "alert_removed":
+            self.remove(event["id"])
+        elif kind == "alerts_fired":
+            for alert in event["alerts"]:
+                self.remove(alert["id"])
+            return event["alerts"]
+        return []
+
+    def remove(self, alert_id: str):
+        if self._journal is not None:
+            self._journal.append(("remove", str(alert_id)))
+        meta = self._alerts.pop(str(alert_id), None)
+        if meta is None:
+            return
+        ticker, direction, threshold, _ = meta
+        entries = self._index.get((ticker, direction))
+        if not entries:
+            return
+        entry = (threshold, str(alert_id))
+        pos = bisect_left(entries, entry)
+        if pos < len(entries) and entries[pos] == entry:
+            del entries[pos]
+
+    def evaluate(self, prices: dict[str, float]) -> list[dict]:
+        """Pop every alert crossed by the given prices and return them."""
+        fired = []
+        for ticker, price in prices.items():
+            above = self._index.get((ticker, "above"))
+            if above:
+                cut = bisect_right(above, (price, "\uffff"))
+                if cut:
+                    fired.extend(self._pop(above[:cut], price))
+                    del above[:cut]
+            below = self._index.get((ticker, "below"))
+            if below:
+                cut = bisect_left(below, (price, ""))
+                if cut < len(below):
+                    fired.extend(self._pop(below[cut:], price))
+                    del below[cut:]
+        return fired
+
+    def _pop(self, entries: list[tuple[float, str]], price: float) -> list[dict]:
+        fired = []
+        for threshold, alert_id in entries:
+            if self._journal is not None:
+                # Already marked triggered, but the running load may have read it as active
+                self._journal.append(("remove", alert_id))
+            ticker, direction, _, user_id = self._alerts.pop(alert_id)
+            fired.append({
+                "id": alert_id,
+                "user_id": user_id,
+                "ticker": ticker,
+                "threshold": threshold,
+                "direction": direction,
+                "price": price,
+            })
+        return fired
+
+
+alert_engine = AlertEngine()
+
+
+async def mark_triggered(fired: list[dict]):
+    """Persist a batch of fired alerts with a single update_many."""
+    if not fired:
+        return
+    ids = [PydanticObjectId(a["id"]) for a in fired]
+    await MarketAlert.find(In(MarketAlert.id, ids)).update(
+        {"$set": {"triggered": True, "is_active": False}}
+    )
+
+
+async def _announce(event: dict):
+    bus = get_price_bus()
+    if bus is None:
+        return
+    try:
+        await bus.publish_event(event)
+    except Exception as e:
+        # Other replicas only see this alert after their next index load
+        print(f"Alert event publish failed: {e}")
+
+
+async def alert_created(alert: MarketAlert):
+    """Index a new alert here and on every other replica."""
+    alert_engine.add(alert)
+    if not alert.is_active or alert.triggered:
+        return
+    await _announce({
+        "type": "alert_added",
+        "alert": {
+            "id": str(alert.id),
+            "user_id": str(alert.user_id),
+            "ticker": alert.ticker.upper(),
+            "threshold": alert.threshold,
+            "direction": alert.direction,
+        },
+    })
+
+
+async def alert_deleted(alert_id: str):
+    """Drop an alert from the index here and on every other replica."""
+    alert_engine.remove(alert_id)
+    await _announce({"type": "alert_removed", "id": str(alert_id)})
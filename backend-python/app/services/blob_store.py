@@ -0,0 +1,163 @@
+"""
+Content-addressed media store.
+
+Every uploaded file is stored once under the SHA-256 of its content, in
+sharded directories (blobs/ab/cd/<sha256><ext>) so no single directory
+grows unbounded. A `blobs` document per hash carries a reference count,
+maintained with atomic $inc: re-sharing the same pitch deck only bumps the
+count, and a delete only removes the bytes once nothing references them.
+
+The bytes live behind `BlobStorage`; LocalBlobStorage writes under
+uploads/ (served by the /uploads static mount), with its blocking file
+calls on worker threads. An S3-compatible backend implements the same
+methods; scripts/check_blob_store.py runs the store against both the local
+backend and an in-memory object-store stand-in.
+
+Dropping to zero deletes the document first and the bytes second, and the
+bytes are kept if they were (re)written within BLOB_DELETE_GRACE_SECONDS.
+A concurrent upload of the same content always rewrites the file after its
+$inc, so it either lands after the delete or leaves a fresh file behind.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.models.blob import Blob
+
+UPLOAD_DIR = "uploads"
+BLOB_DELETE_GRACE_SECONDS = int(os.getenv("BLOB_DELETE_GRACE_SECONDS", "60"))
+
+
+class BlobStorage:
+    async def put(self, src_path: str, key: str):
+        """Move a finished temp file to `key`, replacing any existing copy."""
+        raise NotImplementedError
+
+    async def delete(self, key: str, grace_seconds: int = 0) -> bool:
+        """Remove `key` unless it was written within `grace_seconds`."""
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def key_for_url(self, url: str) -> str | None:
+        """Inverse of url(); None when the URL is not served by this storage."""
+        raise NotImplementedError
+
+
+class LocalBlobStorage(BlobStorage):
+    def __init__(self, root: str = UPLOAD_DIR):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @staticmethod
+    def _put(src_path: str, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(src_path, path)
+
+    @staticmethod
+    def _delete(path: str, grace_seconds: int) -> bool:
+        try:
+            if time.time() - os.path.getmtime(path) < grace_seconds:
+                return False
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def put(self, src_path: str, key: str):
+        await asyncio.to_thread(self._put, src_path, self.path(key))
+
+    async def delete(self, key: str, grace_seconds: int = 0) -> bool:
+        return await asyncio.to_thread(self._delete, self.path(key), grace_seconds)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self.path(key))
+
+    def url(self, key: str) -> str:
+        return f"/{self.root}/{key}"
+
+    def key_for_url(self, url: str) -> str | None:
+        prefix = f"/{self.root}/"
+        if not url.startswith(prefix):
+            return None
+        key = os.path.normpath(url[len(prefix):])
+        # Never let a crafted URL reach outside the upload root
+        if os.path.isabs(key) or key == ".." or key.startswith(".." + os.sep):
+            return None
+        return key
+
+
+blob_storage: BlobStorage = LocalBlobStorage()
+
+
+def blob_key(sha256: str, ext: str) -> str:
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def _sha_from_url(url: str | None) -> str | None:
+    # /uploads/blobs/ab/cd/<sha256><ext> -> <sha256>
+    if not url or "/blobs/" not in url:
+        return None
+    name = url.rsplit("/", 1)[-1]
+    return os.path.splitext(name)[0] or None
+
+
+async def store_blob(tmp_path: str, sha256: str, ext: str, size: int) -> str:
+    """Take ownership of a hashed temp file, add one reference and return its URL."""
+    update = {
+        "$inc": {"refcount": 1},
+        "$setOnInsert": {"ext": ext, "size": size, "created_at": datetime.utcnow()},
+    }
+    collection = Blob.get_motor_collection()
+    try:
+        doc = await collection.find_one_and_update(
+            {"_id": sha256}, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Lost the insert race to an identical upload; the document exists now
+        doc = await collection.find_one_and_update(
+            {"_id": sha256}, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    key = blob_key(sha256, doc.get("ext", ext))
+    # Always rewrite: identical bytes, and it refreshes the file a racing delete checks
+    await blob_storage.put(tmp_path, key)
+    return blob_storage.url(key)
+
+
+async def release_blob(url: str | None):
+    """Drop one reference to the blob behind `url`; delete it when unreferenced.
+
+    URLs from before the blob store (uploads/<uuid>.<ext>) are owned by a
+    single post or avatar, so their file is removed directly.
+    """
+    if not url:
+        return
+    sha256 = _sha_from_url(url)
+    if sha256 is None:
+        key = blob_storage.key_for_url(url)
+        if key is not None:
+            try:
+                await blob_storage.delete(key)
+            except OSError as e:
+                print(f"Error removing file {key}: {e}")
+        return
+
+    collection = Blob.get_motor_collection()
+    doc = await collection.find_one_and_update(
+        {"_id": sha256, "refcount": {"$gt": 0}},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is None or doc["refcount"] > 0:
+        return
+    removed = await collection.delete_one({"_id": sha256, "refcount": {"$lte": 0}})
+    if removed.deleted_count:
+        await blob_storage.delete(blob_key(sha256, doc.get("ext", "")), BLOB_DELETE_GRACE_SECONDS)
@@ -0,0 +1,166 @@
+"""
+Write-behind buffer for hot like/upvote counters.
+
+Reaction toggles add their +1/-1 here instead of issuing an $inc against the
+target document each time. Deltas are coalesced per (model, counter, id)
+and flushed as one unordered bulk write every COUNTER_FLUSH_MS or once
+COUNTER_FLUSH_EVENTS toggles have accumulated, so a viral post costs one
+document update per flush rather than one per click. Readers add
+`pending()` to the stored value to see the not-yet-flushed deltas.
+Listeners registered with `on_flush()` get the ids written by each flush,
+e.g. to recompute scores derived from the counter.
+
+A delta is only put back for a retry when Mongo is known not to have
+applied it (the failed ops of a BulkWriteError, or a bucket never sent).
+A write interrupted mid-flight is not retried, because the server may
+already have applied it; `stop()` therefore lets a running flush finish
+instead of cancelling it. Deltas still buffered when the process is killed
+outright are lost; reaction_service.recount_counters() repairs the drift.
+"""
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable
+from beanie import Document, PydanticObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
+
+COUNTER_FLUSH_MS = int(os.getenv("COUNTER_FLUSH_MS", "250"))
+COUNTER_FLUSH_EVENTS = int(os.getenv("COUNTER_FLUSH_EVENTS", "500"))
+
+
+class CounterBuffer:
+    def __init__(self, flush_ms: int = COUNTER_FLUSH_MS, max_events: int = COUNTER_FLUSH_EVENTS):
+        self.flush_ms = flush_ms
+        self.max_events = max_events
+        # (model, counter field) -> target id -> pending delta
+        self._pending: dict[tuple[type[Document], str], dict[PydanticObjectId, int]] = {}
+        # Deltas taken by a flush that is still writing; still visible to readers
+        self._inflight: dict[tuple[type[Document], str], dict[PydanticObjectId, int]] = {}
+        self._events = 0
+        self._listeners: dict[tuple[type[Document], str], list[Callable[[list], Awaitable]]] = {}
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._metrics = {
+            "flushes": 0,
+            "flushed_updates": 0,
+            "failed_flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+        }
+
+    def add(self, model: type[Document], counter: str, target_id: PydanticObjectId, delta: int):
+        if not delta:
+            return
+        bucket = self._pending.setdefault((model, counter), {})
+        bucket[target_id] = bucket.get(target_id, 0) + delta
+        self._events += 1
+        if self._events >= self.max_events:
+            self._wake.set()
+
+    def on_flush(self, model: type[Document], counter: str, listener: Callable[[list], Awaitable]):
+        """Call `listener(ids)` after each flush that wrote this counter."""
+        self._listeners.setdefault((model, counter), []).append(listener)
+
+    def pending(self, model: type[Document], counter: str, target_id: PydanticObjectId) -> int:
+        total = 0
+        for source in (self._pending, self._inflight):
+            bucket = source.get((model, counter))
+            if bucket:
+                total += bucket.get(target_id, 0)
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "depth": sum(len(b) for b in self._pending.values()),
+            "pending_events": self._events,
+            **self._metrics,
+        }
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending, self._events = self._pending, {}, 0
+            self._inflight = pending
+            started = time.perf_counter()
+            failed = False
+            try:
+                for key in list(pending):
+                    model, counter = key
+                    deltas = pending[key]
+                    ids = [target_id for target_id, delta in deltas.items() if delta]
+                    ops = [UpdateOne({"_id": target_id}, {"$inc": {counter: deltas[target_id]}}) for target_id in ids]
+                    rejected: set[int] = set()
+                    if ops:
+                        try:
+                            await model.get_motor_collection().bulk_write(ops, ordered=False)
+                        except BulkWriteError as e:
+                            # Unordered: everything except the reported ops was applied
+                            rejected = {err["index"] for err in e.details.get("writeErrors", [])}
+                            failed = True
+                            print(f"Counter flush rejected {len(rejected)} of {len(ops)} updates: {e}")
+                        self._metrics["flushed_updates"] += len(ops) - len(rejected)
+                    for i in rejected:
+                        self.add(model, counter, ids[i], deltas[ids[i]])
+                    del pending[key]
+                    written = [target_id for i, target_id in enumerate(ids) if i not in rejected]
+                    for listener in self._listeners.get(key, []) if written else []:
+                        try:
+                            await listener(written)
+                        except Exception as e:
+                            # The counter itself is written; derived values catch up later
+                            print(f"Counter flush listener failed: {e}")
+            except (Exception, asyncio.CancelledError) as e:
+                # The bucket whose write was interrupted may have been applied
+                # and is dropped, unless no server was ever reached; buckets
+                # never sent are retried next flush
+                if not isinstance(e, ServerSelectionTimeoutError):
+                    pending.pop(key, None)
+                for (model, counter), deltas in pending.items():
+                    for target_id, delta in deltas.items():
+                        self.add(model, counter, target_id, delta)
+                self._inflight = {}
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self._metrics["failed_flushes"] += 1
+                print(f"Counter flush failed: {e}")
+                return
+            self._inflight = {}
+            if failed:
+                self._metrics["failed_flushes"] += 1
+            elapsed = (time.perf_counter() - started) * 1000
+            self._metrics["flushes"] += 1
+            self._metrics["last_flush_ms"] = round(elapsed, 2)
+            self._metrics["max_flush_ms"] = max(self._metrics["max_flush_ms"], round(elapsed, 2))
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still buffered.
+
+        The loop is not cancelled: a flush that is mid-write finishes (and
+        is accounted for) before the final flush runs.
+        """
+        self._stopping = True
+        self._wake.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+counter_buffer = CounterBuffer()
@@ -1,6 +1,7 @@
-import random
-import time
-from datetime import datetime
+from array import array
+from datetime import datetime, timezone
+import numpy as np
+from app.models.market import PriceCandle
 
 # Simulated base prices (INR)
 _BASE = {
@@ -16,54 +17,247 @@ _BASE = {
     "IDEAFORGE": 680,
 }
 
-_last_prices: dict[str, float] = {k: v for k, v in _BASE.items()}
-_last_tick = 0.0
+# ─── Producer state ──────────────────────────────────────────────────────────
+# Only the replica elected by the price bus advances the random walk. Prices
+# live in contiguous arrays indexed through _index so a whole tick (and the
+# derived change / change_pct) is a handful of vectorized operations.
+_rng = np.random.default_rng()
+_symbols: list[str] = []
+_index: dict[str, int] = {}
+_base = np.empty(0)
+_last = np.empty(0)
+_change = np.empty(0)
+_pct = np.empty(0)
+
+# ─── Read-only cache ─────────────────────────────────────────────────────────
+# Every replica serves REST and WebSocket readers from the last snapshot it
+# consumed from the price bus, so readers do no per-request computation.
+_snapshot: dict = {}
+_stocks: list = []
+
+# ─── Tick history ────────────────────────────────────────────────────────────
+# Per-ticker OHLC rings rolled up incrementally from every consumed snapshot.
+# The 1s ring doubles as the raw tick store (the bus ticks about once a second).
+# Capacities bound memory per ticker: 15 min of 1s, 10 h of 1m, 1 day of 5m
+# and 1 week of 1h candles.
+INTERVALS = {"1s": 1, "1m": 60, "5m": 300, "1h": 3600}
+_CAPACITY = {"1s": 900, "1m": 600, "5m": 288, "1h": 168}
+
+
+class _CandleRing:
+    """Fixed-capacity ring of OHLC candles stored in compact float arrays."""
+
+    __slots__ = ("seconds", "capacity", "head", "start", "open", "high", "low", "close")
+
+    def __init__(self, seconds: int, capacity: int):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.head = 0  # index of the oldest candle once the ring is full
+        self.start = array("d")
+        self.open = array("d")
+        self.high = array("d")
+        self.low = array("d")
+        self.close = array("d")
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def _last(self) -> int:
+        return (self.head - 1) % len(self.start)
+
+    def add(self, ts: float, price: float):
+        bucket = ts - ts % self.seconds
+        n = len(self.start)
+        if n:
+            i = self._last()
+            if self.start[i] == bucket:
+                if price > self.high[i]:
+                    self.high[i] = price
+                if price < self.low[i]:
+                    self.low[i] = price
+                self.close[i] = price
+                return
+            if bucket < self.start[i]:
+                return  # late tick for a closed candle
+        if n < self.capacity:
+            for col, value in zip(
+                (self.start, self.open, self.high, self.low, self.close),
+                (bucket, price, price, price, price),
+            ):
+                col.append(value)
+            self.head = (n + 1) % self.capacity
+        else:
+            i = self.head
+            self.start[i] = bucket
+            self.open[i] = self.high[i] = self.low[i] = self.close[i] = price
+            self.head = (i + 1) % self.capacity
+
+    def candles(self, limit: int | None = None, since: float | None = None) -> list[dict]:
+        n = len(self.start)
+        count = n if limit is None else min(limit, n)
+        first = self.head if n == self.capacity else 0
+        out = []
+        for k in range(n - count, n):
+            i = (first + k) % n
+            if since is not None and self.start[i] < since:
+                continue
+            out.append({
+                "timestamp": datetime.utcfromtimestamp(self.start[i]).isoformat(),
+                "open": self.open[i],
+                "high": self.high[i],
+                "low": self.low[i],
+                "close": self.close[i],
+            })
+        return out
+
+
+_history: dict[str, dict[str, _CandleRing]] = {}
+_persisted_until: dict[str, float] = {}
+
+
+def _record_history(snapshot: dict):
+    if not snapshot:
+        return
+    stamp = next(iter(snapshot.values())).get("timestamp")
+    try:
+        ts = datetime.fromisoformat(stamp).replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        ts = datetime.now(timezone.utc).timestamp()
+    for ticker, info in snapshot.items():
+        rings = _history.get(ticker)
+        if rings is None:
+            rings = _history[ticker] = {
+                name: _CandleRing(seconds, _CAPACITY[name]) for name, seconds in INTERVALS.items()
+            }
+        price = info["price"]
+        for ring in rings.values():
+            ring.add(ts, price)
+
+
+def set_universe(base_prices: dict[str, float]):
+    """(Re)build the producer arrays for a set of tickers and base prices."""
+    global _symbols, _index, _base, _last, _change, _pct
+    _symbols = list(base_prices)
+    _index = {ticker: i for i, ticker in enumerate(_symbols)}
+    _base = np.array([base_prices[t] for t in _symbols], dtype=np.float64)
+    _last = _base.copy()
+    _change = np.zeros_like(_base)
+    _pct = np.zeros_like(_base)
+
+
+set_universe(_BASE)
 
 
 def _tick_prices():
-    global _last_tick
-    now = time.time()
-    if now - _last_tick > 1:
-        for k in _last_prices:
-            change = random.uniform(-0.003, 0.003)
-            _last_prices[k] = round(_last_prices[k] * (1 + change), 2)
-        _last_tick = now
+    # Updated in place: no per-tick array allocations beyond the random draw
+    np.multiply(_last, 1 + _rng.uniform(-0.003, 0.003, _last.size), out=_last)
+    np.round(_last, 2, out=_last)
+    np.subtract(_last, _base, out=_change)
+    np.round(_change, 2, out=_change)
+    np.divide(_change, _base, out=_pct)
+    np.multiply(_pct, 100, out=_pct)
+    np.round(_pct, 2, out=_pct)
 
 
-def get_market_snapshot() -> dict:
+def seed_prices(snapshot: dict):
+    """Continue the random walk from a snapshot published by a previous producer."""
+    for ticker, info in snapshot.items():
+        i = _index.get(ticker)
+        if i is not None:
+            _last[i] = info["price"]
+
+
+def produce_snapshot() -> dict:
+    """Advance prices one tick and build the snapshot to publish."""
     _tick_prices()
-    snapshot = {}
-    for ticker, price in _last_prices.items():
-        base = _BASE[ticker]
-        change = round(price - base, 2)
-        change_pct = round((change / base) * 100, 2)
-        snapshot[ticker] = {
+    timestamp = datetime.utcnow().isoformat()
+    # tolist() converts each array to Python floats in one C-level pass
+    return {
+        ticker: {
             "price": price,
             "change": change,
             "change_pct": change_pct,
             "direction": "up" if change >= 0 else "down",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp,
         }
-    return snapshot
+        for ticker, price, change, change_pct in zip(
+            _symbols, _last.tolist(), _change.tolist(), _pct.tolist()
+        )
+    }
 
 
-def get_stocks_list() -> list:
-    _tick_prices()
-    stocks = []
-    for ticker, price in _last_prices.items():
-        base = _BASE[ticker]
-        change = round(price - base, 2)
-        change_pct = round((change / base) * 100, 2)
-        stocks.append({
+def apply_snapshot(snapshot: dict):
+    """Replace the local read cache with a snapshot consumed from the price bus."""
+    global _snapshot, _stocks
+    _stocks = [
+        {
             "ticker": ticker,
-            "price": price,
-            "change": change,
-            "change_pct": change_pct,
-            "direction": "up" if change >= 0 else "down",
-        })
-    return stocks
+            "price": info["price"],
+            "change": info["change"],
+            "change_pct": info["change_pct"],
+            "direction": info["direction"],
+        }
+        for ticker, info in snapshot.items()
+    ]
+    _snapshot = snapshot
+    _record_history(snapshot)
+
+
+def _ensure_cache():
+    # Before the first bus message arrives, serve the seeded base prices
+    if not _snapshot:
+        apply_snapshot(produce_snapshot())
+
+
+def get_tickers() -> list[str]:
+    return list(_symbols)
+
+
+def is_ticker(ticker: str) -> bool:
+    return ticker in _index
+
+
+def get_market_snapshot() -> dict:
+    _ensure_cache()
+    return _snapshot
+
+
+def get_stocks_list() -> list:
+    _ensure_cache()
+    return _stocks
+
+
+def get_prices() -> dict[str, float]:
+    _ensure_cache()
+    return {ticker: info["price"] for ticker, info in _snapshot.items()}
+
+
+def get_history(ticker: str, interval: str = "1m", limit: int | None = None) -> list[dict] | None:
+    """OHLC candles for a ticker, oldest first; None if the ticker has no history."""
+    rings = _history.get(ticker.upper())
+    if rings is None:
+        return None
+    return rings[interval].candles(limit)
+
+
+async def persist_candles(interval: str = "1m"):
+    """Write candles closed since the last call to the Mongo time-series collection."""
+    now = datetime.now(timezone.utc).timestamp()
+    current_bucket = now - now % INTERVALS[interval]
+    since = _persisted_until.get(interval, 0.0)
+    docs = []
+    for ticker, rings in _history.items():
+        for c in rings[interval].candles(since=since):
+            ts = datetime.fromisoformat(c.pop("timestamp"))
+            if ts.replace(tzinfo=timezone.utc).timestamp() >= current_bucket:
+                continue  # still open
+            docs.append(PriceCandle(ticker=ticker, interval=interval, timestamp=ts, **c))
+    if docs:
+        await PriceCandle.insert_many(docs)
+    _persisted_until[interval] = current_bucket
 
 
 def get_price(ticker: str) -> float | None:
-    _tick_prices()
-    return _last_prices.get(ticker.upper())
+    _ensure_cache()
+    info = _snapshot.get(ticker.upper())
+    return info["price"] if info else None
@@ -0,0 +1,183 @@
+"""
+Skill-based matching between users, jobs and POCs.
+
+Three in-memory inverted indexes map normalized skill/tag tokens to the
+documents that carry them:
+- jobs:  active Job.skills
+- pocs:  POC.tags
+- users: profile bio and company terms
+
+A query is the token set of one document (a user's profile, a job's
+skills) and is scored against only the postings lists of its own tokens,
+so cost depends on how common those tokens are, not on collection size.
+Each match scores sum(idf(t)^2) over shared tokens divided by the
+candidate's token-vector length (TF-IDF cosine with binary term
+frequency). Rare skills count for more than "startup". heapq keeps only
+the top k. Candidate norms are cached per document and recomputed in one
+pass once inserts and removals since the last pass exceed
+NORM_REFRESH_RATIO of the index, i.e. once the IDFs they used have
+drifted; in between, a new document's norm uses the IDFs of its insert.
+
+The indexes are built by a startup warmup and updated in place by the
+routers on create/close/delete. Every replica also rebuilds them every
+MATCHING_REFRESH_SECONDS to pick up writes handled by other replicas.
+"""
+import asyncio
+import heapq
+import math
+import os
+from beanie import PydanticObjectId
+from app.models.job import Job
+from app.models.poc import POC
+from app.models.user import User, search_tokens
+
+MATCHING_REFRESH_SECONDS = int(os.getenv("MATCHING_REFRESH_SECONDS", "600"))
+NORM_REFRESH_RATIO = 0.1
+
+# Free-text profile words that say nothing about skills
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "i", "in", "is",
+    "it", "its", "my", "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "with",
+    "you", "your", "am", "was", "will", "who", "building", "working", "currently",
+}
+
+
+def match_tokens(*texts: str | None) -> set[str]:
+    """Normalized word tokens for matching; skills like "React Native" become {"react", "native"}."""
+    return {t for t in search_tokens(*texts) if len(t) > 1 and t not in _STOPWORDS}
+
+
+class InvertedIndex:
+    def __init__(self):
+        # token -> doc ids carrying it
+        self._postings: dict[str, set[str]] = {}
+        # doc id -> (tokens, owner id)
+        self._docs: dict[str, tuple[frozenset[str], str | None]] = {}
+        # doc id -> TF-IDF vector length, as of the IDFs when it was computed
+        self._norms: dict[str, float] = {}
+        # adds/removes since the norms were last recomputed together
+        self._changes = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id, tokens: set[str], owner=None):
+        doc_id = str(doc_id)
+        self.remove(doc_id)
+        if not tokens:
+            return
+        self._docs[doc_id] = (frozenset(tokens), str(owner) if owner else None)
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(doc_id)
+        self._norms[doc_id] = self._norm(tokens)
+        self._changes += 1
+
+    def remove(self, doc_id):
+        entry = self._docs.pop(str(doc_id), None)
+        if entry is None:
+            return
+        self._norms.pop(str(doc_id), None)
+        self._changes += 1
+        for token in entry[0]:
+            ids = self._postings.get(token)
+            if ids is not None:
+                ids.discard(str(doc_id))
+                if not ids:
+                    del self._postings[token]
+
+    def tokens(self, doc_id) -> frozenset[str]:
+        entry = self._docs.get(str(doc_id))
+        return entry[0] if entry else frozenset()
+
+    def _idf(self, token: str) -> float:
+        return math.log(1 + len(self._docs) / len(self._postings[token]))
+
+    def _norm(self, tokens) -> float:
+        return math.sqrt(sum(self._idf(t) ** 2 for t in tokens))
+
+    def refresh_norms(self):
+        """Recompute every cached norm against the current IDFs."""
+        self._norms = {doc_id: self._norm(tokens) for doc_id, (tokens, _) in self._docs.items()}
+        self._changes = 0
+
+    def top(self, tokens: set[str], k: int = 10, exclude_owner=None) -> list[tuple[str, float, list[str]]]:
+        """Best k (doc id, score, shared tokens) for a query token set."""
+        exclude_owner = str(exclude_owner) if exclude_owner else None
+        if self._changes > len(self._docs) * NORM_REFRESH_RATIO:
+            self.refresh_norms()
+        scores: dict[str, float] = {}
+        shared: dict[str, list[str]] = {}
+        for token in tokens:
+            ids = self._postings.get(token)
+            if not ids:
+                continue
+            weight = self._idf(token) ** 2
+            for doc_id in ids:
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+                shared.setdefault(doc_id, []).append(token)
+        ranked = []
+        for doc_id, score in scores.items():
+            if exclude_owner and self._docs[doc_id][1] == exclude_owner:
+                continue
+            ranked.append((score / self._norms[doc_id], doc_id))
+        return [
+            (doc_id, round(score, 4), sorted(shared[doc_id]))
+            for score, doc_id in heapq.nlargest(k, ranked)
+        ]
+
+
+job_index = InvertedIndex()
+poc_index = InvertedIndex()
+user_index = InvertedIndex()
+
+
+def index_job(job: Job):
+    if job.is_active:
+        job_index.add(job.id, match_tokens(*job.skills), job.posted_by)
+    else:
+        job_index.remove(job.id)
+
+
+def index_poc(poc: POC):
+    poc_index.add(poc.id, match_tokens(*poc.tags), poc.author_id)
+
+
+def index_user(user: User):
+    user_index.add(user.id, match_tokens(user.bio, user.company), user.id)
+
+
+def profile_tokens(user_id: PydanticObjectId) -> set[str]:
+    return set(user_index.tokens(user_id))
+
+
+async def build_indexes():
+    """(Re)build all three indexes from Mongo with projected scans."""
+    jobs, pocs, users = InvertedIndex(), InvertedIndex(), InvertedIndex()
+    async for doc in Job.get_motor_collection().find({"is_active": True}, {"skills": 1, "posted_by": 1}):
+        jobs.add(doc["_id"], match_tokens(*doc.get("skills", [])), doc.get("posted_by"))
+    async for doc in POC.get_motor_collection().find({}, {"tags": 1, "author_id": 1}):
+        pocs.add(doc["_id"], match_tokens(*doc.get("tags", [])), doc.get("author_id"))
+    async for doc in User.get_motor_collection().find({}, {"bio": 1, "company": 1}):
+        users.add(doc["_id"], match_tokens(doc.get("bio"), doc.get("company")), doc["_id"])
+    # Swap contents in place so importers keep their references
+    for live, fresh in ((job_index, jobs), (poc_index, pocs), (user_index, users)):
+        fresh.refresh_norms()
+        live._postings, live._docs, live._norms, live._changes = (
+            fresh._postings, fresh._docs, fresh._norms, fresh._changes
+        )
+
+
+async def run_matching_refresh():
+    """Background loop: rebuild the indexes every MATCHING_REFRESH_SECONDS."""
+    while True:
+        await asyncio.sleep(MATCHING_REFRESH_SECONDS)
+        try:
+            await build_indexes()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Matching index refresh failed: {e}")
+
+
+def matching_stats() -> dict:
+    return {"jobs": len(job_index), "pocs": len(poc_index), "users": len(user_index)}
@@ -0,0 +1,83 @@
+"""
+Pre-serialized JSON responses for read-mostly endpoints.
+
+A handler passes the version of its source data plus a builder. The payload
+is rendered and encoded once per version (and per variant key, e.g. a
+`limit`), then served as raw bytes with a strong ETag and Last-Modified.
+Requests with a matching If-None-Match (or an unchanged If-Modified-Since)
+get a 304 with no body.
+"""
+import json
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Hashable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+class _Entry:
+    __slots__ = ("version", "body", "etag", "last_modified")
+
+    def __init__(self, version: Hashable, body: bytes, etag: str, last_modified: datetime):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class MaterializedResponse:
+    def __init__(self, max_variants: int = 64):
+        self.max_variants = max_variants
+        self._entries: dict[Hashable, _Entry] = {}
+        self.renders = 0
+        self.not_modified = 0
+
+    def _entry(self, version: Hashable, build: Callable[[], Any], key: Hashable) -> _Entry:
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            return entry
+        body = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.renders += 1
+        if entry is not None and entry.etag == etag:
+            # Source moved on but the bytes did not: keep the original timestamp
+            entry.version = version
+            return entry
+        if key not in self._entries and len(self._entries) >= self.max_variants:
+            self._entries.pop(next(iter(self._entries)))
+        # HTTP dates have second precision
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        entry = self._entries[key] = _Entry(version, body, etag, now)
+        return entry
+
+    @staticmethod
+    def _fresh(request: Request, entry: _Entry) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return "*" in tags or entry.etag in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return entry.last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def respond(
+        self, request: Request, version: Hashable, build: Callable[[], Any], key: Hashable = None
+    ) -> Response:
+        entry = self._entry(version, build, key)
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        if self._fresh(request, entry):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {"variants": len(self._entries), "renders": self.renders, "not_modified": self.not_modified}
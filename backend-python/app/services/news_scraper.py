@@ -1,15 +1,43 @@
+"""
+News ingestion pipeline, run periodically in the background:
+
+1. fetch   — all configured sources concurrently over one shared httpx.AsyncClient
+2. dedupe  — normalize URLs, hash them, drop in-batch repeats and articles
+             already stored (unique url_hash index)
+3. score   — sentiment for the new articles only, off the event loop
+4. write   — one unordered bulk upsert keyed by url_hash, then the
+             sentiment window is reloaded from the stored articles so every
+             replica converges on the same market score
+
+Per-stage timings are kept in `ingestion_stats()`.
+"""
 import os
+import time
+import asyncio
+import hashlib
 import httpx
-from bs4 import BeautifulSoup
 from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from pymongo import UpdateOne
+from beanie.operators import In
 from app.models.market import NewsArticle
-from app.services.sentiment_service import analyze_text
+from app.services.sentiment_service import analyze_texts, load_sentiment_window
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # GNews API Configuration
 GNEWS_API_KEY = os.getenv("NEWS_API_KEY")
+NEWS_REFRESH_SECONDS = int(os.getenv("NEWS_REFRESH_SECONDS", "900"))
+MAX_ARTICLES_PER_SOURCE = 15
+
+# Startup / tech headlines plus targeted searches for the Indian ecosystem
+_SOURCES = [
+    "https://gnews.io/api/v4/top-headlines?category=technology&lang=en&token={key}",
+    "https://gnews.io/api/v4/search?q=startup%20india&lang=en&token={key}",
+    "https://gnews.io/api/v4/search?q=startup%20funding&lang=en&country=in&token={key}",
+]
+
 
 # Lightweight mock news for offline/dev mode
 _MOCK_NEWS = [
@@ -21,67 +49,164 @@ _MOCK_NEWS = [
 
 _cached_articles: list[dict] = []
 
-async def scrape_and_store():
-    """Attempt to fetch from GNews; fall back to mock data."""
-    global _cached_articles
-    articles = []
+_news_version = 0
+_stage_stats: dict[str, dict] = {}
 
-    if GNEWS_API_KEY:
-        try:
-            async with httpx.AsyncClient(timeout=15) as client:
-                # Top technology headlines for startup context
-                url = f"https://gnews.io/api/v4/top-headlines?category=technology&lang=en&token={GNEWS_API_KEY}"
-                resp = await client.get(url)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    for item in data.get("articles", [])[:15]:
-                        articles.append({
-                            "title": item.get("title"),
-                            "url": item.get("url"),
-                            "source": item.get("source", {}).get("name", "GNews"),
-                            "summary": item.get("description", ""),
-                            "image_url": item.get("image"),
-                            "published_at": item.get("publishedAt"),
-                        })
-        except Exception as e:
-            print(f"GNews API request failed: {e}")
 
+def _record_stage(stage: str, started: float, items: int):
+    elapsed = (time.perf_counter() - started) * 1000
+    stats = _stage_stats.setdefault(stage, {"runs": 0, "last_ms": 0.0, "total_ms": 0.0, "last_items": 0})
+    stats["runs"] += 1
+    stats["last_ms"] = round(elapsed, 2)
+    stats["total_ms"] = round(stats["total_ms"] + elapsed, 2)
+    stats["last_items"] = items
+
+
+def ingestion_stats() -> dict:
+    return {stage: dict(s) for stage, s in _stage_stats.items()}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for dedupe: lowercase host, no fragment, tracking params or trailing slash."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in ("ref", "fbclid", "gclid")
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, query, ""))
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+async def _fetch_source(client: httpx.AsyncClient, url: str) -> list[dict]:
+    try:
+        resp = await client.get(url.format(key=GNEWS_API_KEY))
+        if resp.status_code != 200:
+            return []
+        data = resp.json()
+    except Exception as e:
+        print(f"GNews API request failed: {e}")
+        return []
+    return [
+        {
+            "title": item.get("title"),
+            "url": item.get("url"),
+            "source": item.get("source", {}).get("name", "GNews"),
+            "summary": item.get("description", ""),
+            "image_url": item.get("image"),
+            "published_at": item.get("publishedAt"),
+        }
+        for item in data.get("articles", [])[:MAX_ARTICLES_PER_SOURCE]
+    ]
+
+
+async def _fetch_all() -> list[dict]:
+    articles = []
+    if GNEWS_API_KEY:
+        async with httpx.AsyncClient(timeout=15) as client:
+            results = await asyncio.gather(*(_fetch_source(client, url) for url in _SOURCES))
+        for batch in results:
+            articles.extend(batch)
     if len(articles) < 3:
         articles = _MOCK_NEWS[:]
+    return [a for a in articles if a.get("title") and a.get("url")]
 
-    stored = []
-    for art in articles[:15]:
-        score, label = analyze_text(art["title"] + " " + (art.get("summary") or ""))
-        
-        pub_at = art.get("published_at")
-        if isinstance(pub_at, str):
-            try:
-                # Handle ISO format from GNews
-                pub_at = datetime.fromisoformat(pub_at.replace('Z', '+00:00'))
-            except Exception:
-                pub_at = datetime.utcnow()
-        else:
-            pub_at = datetime.utcnow()
 
+def _parse_published(pub_at) -> datetime:
+    if isinstance(pub_at, str):
+        try:
+            # Handle ISO format from GNews
+            return datetime.fromisoformat(pub_at.replace('Z', '+00:00'))
+        except Exception:
+            pass
+    return datetime.utcnow()
+
+
+async def scrape_and_store():
+    """Run one ingestion pass and refresh the in-memory news cache."""
+    global _cached_articles, _news_version
+
+    started = time.perf_counter()
+    fetched = await _fetch_all()
+    _record_stage("fetch", started, len(fetched))
+
+    started = time.perf_counter()
+    batch: dict[str, dict] = {}
+    for art in fetched:
+        batch.setdefault(url_hash(art["url"]), art)
+    existing = {
+        doc["url_hash"]
+        async for doc in NewsArticle.get_motor_collection().find(
+            {"url_hash": {"$in": list(batch)}}, {"url_hash": 1, "_id": 0}
+        )
+    }
+    new = {h: art for h, art in batch.items() if h not in existing}
+    _record_stage("dedupe", started, len(new))
+
+    started = time.perf_counter()
+    texts = [art["title"] + " " + (art.get("summary") or "") for art in new.values()]
+    scores = await asyncio.to_thread(analyze_texts, texts) if texts else []
+    _record_stage("score", started, len(scores))
+
+    started = time.perf_counter()
+    ops = []
+    for (h, art), (score, label) in zip(new.items(), scores):
         doc = NewsArticle(
             title=art["title"],
             url=art["url"],
+            url_hash=h,
             source=art["source"],
             summary=art.get("summary"),
             image_url=art.get("image_url"),
             sentiment_score=score,
             sentiment_label=label,
-            published_at=pub_at,
+            published_at=_parse_published(art.get("published_at")),
         )
+        fields = doc.model_dump(exclude={"id", "revision_id"})
+        ops.append(UpdateOne({"url_hash": h}, {"$setOnInsert": fields}, upsert=True))
+    if ops:
         try:
-            await doc.insert()
-        except Exception:
-            pass
-        stored.append(doc)
+            await NewsArticle.get_motor_collection().bulk_write(ops, ordered=False)
+        except Exception as e:
+            print(f"News bulk write failed: {e}")
+    # Reload rather than fold in local inserts: another replica may have stored them first
+    await load_sentiment_window()
+    _record_stage("write", started, len(ops))
 
-    _cached_articles = [art.model_dump() if hasattr(art, "model_dump") else art.dict() for art in stored]
+    stored = await NewsArticle.find(In(NewsArticle.url_hash, list(batch))).sort(
+        -NewsArticle.published_at
+    ).to_list()
+    if stored:
+        _cached_articles = [art.model_dump() for art in stored]
+        _news_version += 1
     return stored
 
+
+async def warm_news():
+    """Startup warmup: seed the sentiment window, then run the first ingestion pass."""
+    await load_sentiment_window()
+    await scrape_and_store()
+
+
+async def run_news_ingestion():
+    """Background loop: re-ingest every NEWS_REFRESH_SECONDS (the first pass is a startup warmup)."""
+    while True:
+        await asyncio.sleep(NEWS_REFRESH_SECONDS)
+        try:
+            await scrape_and_store()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"News ingestion failed: {e}")
+
+def news_version() -> int:
+    """Bumped whenever an ingestion pass replaces the cached articles."""
+    return _news_version
+
+
 async def get_cached_news() -> list:
     """Return cached or mock articles."""
     if not _cached_articles:
@@ -0,0 +1,223 @@
+"""
+Background cleanup for deleted community posts.
+
+DELETE /community/{id} only stamps `deleted_at`, which hides the post at
+once. The reaper then picks up posts deleted more than REAPER_GRACE_SECONDS
+ago (so in-flight likes and comments settle first) and, per post:
+
+1. releases its media blobs, guarded by the `media_released` flag so a
+   retry never drops a reference twice
+2. deletes its comments in batches of REAPER_BATCH_SIZE
+3. deletes its reactions
+4. deletes the post document itself
+
+Every step is idempotent and the post document goes last, so a crash at
+any point just means the next pass resumes it.
+
+Sweep mode garbage-collects files under uploads/ that nothing references:
+blob files without a `blobs` document, pre-blob-store files no post or
+avatar points at, and stale upload temp files. Files younger than
+BLOB_DELETE_GRACE_SECONDS are never touched, and orphans are deleted
+through the blob storage, which rechecks that age off the event loop.
+Run it with: python -m app.services.post_reaper --sweep
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from app.database import init_db
+from app.models.blob import Blob
+from app.models.community import CommunityPost, CommunityComment
+from app.models.reaction import Reaction
+from app.models.user import User
+from app.services import blob_store
+from app.services.blob_store import UPLOAD_DIR, BLOB_DELETE_GRACE_SECONDS, release_blob
+
+REAPER_INTERVAL_SECONDS = int(os.getenv("REAPER_INTERVAL_SECONDS", "60"))
+REAPER_GRACE_SECONDS = int(os.getenv("REAPER_GRACE_SECONDS", "30"))
+REAPER_BATCH_SIZE = int(os.getenv("REAPER_BATCH_SIZE", "1000"))
+ORPHAN_SWEEP_SECONDS = int(os.getenv("ORPHAN_SWEEP_SECONDS", "0"))  # 0 = CLI only
+_TMP_MAX_AGE_SECONDS = 3600
+
+_stats = {
+    "passes": 0,
+    "reaped_posts": 0,
+    "deleted_comments": 0,
+    "deleted_reactions": 0,
+    "sweeps": 0,
+    "swept_files": 0,
+}
+
+
+def reaper_stats() -> dict:
+    return dict(_stats)
+
+
+async def _delete_comments(post_id: str) -> int:
+    collection = CommunityComment.get_motor_collection()
+    deleted = 0
+    while True:
+        ids = [
+            doc["_id"]
+            async for doc in collection.find({"post_id": post_id}, {"_id": 1}).limit(REAPER_BATCH_SIZE)
+        ]
+        if not ids:
+            return deleted
+        result = await collection.delete_many({"_id": {"$in": ids}})
+        deleted += result.deleted_count
+
+
+async def _reap_post(post: dict):
+    posts = CommunityPost.get_motor_collection()
+    if not post.get("media_released"):
+        claimed = await posts.update_one(
+            {"_id": post["_id"], "media_released": {"$ne": True}}, {"$set": {"media_released": True}}
+        )
+        # Only the pass that flips the flag drops the references
+        if claimed.modified_count:
+            if post.get("has_image"):
+                await release_blob(post.get("image_url"))
+            if post.get("has_file"):
+                await release_blob(post.get("file_url"))
+
+    _stats["deleted_comments"] += await _delete_comments(str(post["_id"]))
+    reactions = await Reaction.get_motor_collection().delete_many(
+        {"target_type": "post", "target_id": post["_id"]}
+    )
+    _stats["deleted_reactions"] += reactions.deleted_count
+    await posts.delete_one({"_id": post["_id"]})
+    _stats["reaped_posts"] += 1
+
+
+async def reap_deleted_posts() -> int:
+    """Reap every post soft-deleted before the grace cutoff; returns how many."""
+    cutoff = datetime.utcnow() - timedelta(seconds=REAPER_GRACE_SECONDS)
+    projection = {"_id": 1, "has_image": 1, "image_url": 1, "has_file": 1, "file_url": 1, "media_released": 1}
+    reaped = 0
+    cursor = CommunityPost.get_motor_collection().find({"deleted_at": {"$lte": cutoff}}, projection)
+    async for post in cursor:
+        try:
+            await _reap_post(post)
+            reaped += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Left in place; the next pass picks it up again
+            print(f"Reaping post {post['_id']} failed: {e}")
+    _stats["passes"] += 1
+    return reaped
+
+
+_wake = asyncio.Event()
+
+
+def wake_reaper():
+    """Ask the reaper loop for a pass once the grace period has run out."""
+    _wake.set()
+
+
+async def run_post_reaper():
+    """Background loop: reap on wake-up (after the grace period) or every REAPER_INTERVAL_SECONDS."""
+    while True:
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=REAPER_INTERVAL_SECONDS)
+            _wake.clear()
+            await asyncio.sleep(REAPER_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await reap_deleted_posts()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Post reaper pass failed: {e}")
+
+
+def _list_files(now: float) -> list[tuple[str, str]]:
+    """(path, url) for every sweepable file under UPLOAD_DIR; stale temp files are removed here."""
+    files = []
+    for root, _, names in os.walk(UPLOAD_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                age = now - os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if name.startswith(".tmp-"):
+                if age > _TMP_MAX_AGE_SECONDS:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                continue
+            if age < BLOB_DELETE_GRACE_SECONDS:
+                continue
+            files.append((path, "/" + path.replace(os.sep, "/")))
+    return files
+
+
+async def sweep_orphan_files() -> int:
+    """Delete files under uploads/ that no document references; returns how many."""
+    files = await asyncio.to_thread(_list_files, time.time())
+    blob_files = [(path, url) for path, url in files if "/blobs/" in url]
+    legacy_files = [(path, url) for path, url in files if "/blobs/" not in url]
+
+    orphans = []
+    for start in range(0, len(blob_files), REAPER_BATCH_SIZE):
+        batch = blob_files[start:start + REAPER_BATCH_SIZE]
+        hashes = {os.path.splitext(os.path.basename(path))[0]: (path, url) for path, url in batch}
+        known = {
+            doc["_id"]
+            async for doc in Blob.get_motor_collection().find({"_id": {"$in": list(hashes)}}, {"_id": 1})
+        }
+        orphans.extend(url for sha256, (_, url) in hashes.items() if sha256 not in known)
+
+    if legacy_files:
+        # Pre-blob-store URLs are unindexed; one projected scan beats a query per file
+        referenced = set()
+        async for doc in CommunityPost.get_motor_collection().find(
+            {}, {"image_url": 1, "file_url": 1, "_id": 0}
+        ):
+            referenced.update(v for v in doc.values() if v)
+        async for doc in User.get_motor_collection().find(
+            {"avatar_url": {"$ne": None}}, {"avatar_url": 1, "_id": 0}
+        ):
+            referenced.add(doc["avatar_url"])
+        orphans.extend(url for path, url in legacy_files if url not in referenced)
+
+    swept = 0
+    storage = blob_store.blob_storage
+    for url in orphans:
+        key = storage.key_for_url(url)
+        # A file rewritten since it was listed (a re-upload of the same blob) is kept
+        if key and await storage.delete(key, grace_seconds=BLOB_DELETE_GRACE_SECONDS):
+            swept += 1
+    _stats["sweeps"] += 1
+    _stats["swept_files"] += swept
+    return swept
+
+
+async def run_orphan_sweeper():
+    """Background loop: sweep orphaned files every ORPHAN_SWEEP_SECONDS."""
+    while True:
+        await asyncio.sleep(ORPHAN_SWEEP_SECONDS)
+        try:
+            await sweep_orphan_files()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Orphan sweep failed: {e}")
+
+
+async def main():
+    await init_db()
+    reaped = await reap_deleted_posts()
+    print(f"Reaped {reaped} deleted posts")
+    if "--sweep" in sys.argv:
+        swept = await sweep_orphan_files()
+        print(f"Removed {swept} orphaned files")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
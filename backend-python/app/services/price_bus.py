@@ -0,0 +1,218 @@
+"""
+Price bus: distributes market snapshots from one elected producer to every
+backend replica.
+
+- InProcessPriceBus: single-node deployments; this process is always the
+  producer and publishing updates the local cache directly.
+- RedisPriceBus: any Redis-protocol server. Leadership is a `SET NX PX`
+  lease, snapshots go out over PUBLISH and the latest one is also stored
+  under a key so new replicas start warm.
+
+The bus also carries small control events on a second channel (alert
+added / removed / fired) so per-replica in-memory state stays in sync;
+every replica, the publisher included, receives each event once.
+
+Select the backend with PRICE_BUS_URL (e.g. redis://redis:6379/0); when it
+is unset the in-process bus is used. Set MARKET_HISTORY_PERSIST_SECONDS to
+have the producer also flush closed 1m candles to Mongo periodically.
+"""
+import asyncio
+import json
+import os
+import uuid
+from typing import Awaitable, Callable
+from app.services.market_service import (
+    apply_snapshot, produce_snapshot, seed_prices, get_market_snapshot, persist_candles,
+)
+
+PRICE_BUS_URL = os.getenv("PRICE_BUS_URL")
+TICK_INTERVAL = 1.0  # seconds between produced snapshots
+HISTORY_PERSIST_SECONDS = int(os.getenv("MARKET_HISTORY_PERSIST_SECONDS", "0"))  # 0 = disabled
+
+_CHANNEL = "founderhq:market:ticks"
+_EVENTS_CHANNEL = "founderhq:market:events"
+_LATEST_KEY = "founderhq:market:latest"
+_LEADER_KEY = "founderhq:market:leader"
+_LEASE_MS = 5000
+
+# Renew the lease only if this node still owns it
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class PriceBus:
+    def __init__(self):
+        self._event_handlers: list[Callable[[dict], Awaitable]] = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def is_leader(self) -> bool:
+        raise NotImplementedError
+
+    @property
+    def leader(self) -> bool:
+        """Leadership as of the last is_leader() call, without a round trip."""
+        raise NotImplementedError
+
+    async def publish(self, snapshot: dict):
+        raise NotImplementedError
+
+    async def publish_event(self, event: dict):
+        raise NotImplementedError
+
+    def on_event(self, handler: Callable[[dict], Awaitable]):
+        self._event_handlers.append(handler)
+
+    async def _dispatch_event(self, event: dict):
+        for handler in self._event_handlers:
+            try:
+                await handler(event)
+            except Exception as e:
+                print(f"Price bus event handler error: {e}")
+
+
+class InProcessPriceBus(PriceBus):
+    async def is_leader(self) -> bool:
+        return True
+
+    @property
+    def leader(self) -> bool:
+        return True
+
+    async def publish(self, snapshot: dict):
+        apply_snapshot(snapshot)
+
+    async def publish_event(self, event: dict):
+        await self._dispatch_event(event)
+
+
+class RedisPriceBus(PriceBus):
+    def __init__(self, url: str = None, client=None):
+        super().__init__()
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self.redis = client
+        self.node_id = uuid.uuid4().hex
+        self._leader = False
+        self._pubsub = None
+        self._consumer: asyncio.Task | None = None
+
+    async def start(self):
+        latest = await self.redis.get(_LATEST_KEY)
+        if latest:
+            apply_snapshot(json.loads(latest))
+        self._pubsub = self.redis.pubsub()
+        await self._pubsub.subscribe(_CHANNEL, _EVENTS_CHANNEL)
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        if self._consumer:
+            self._consumer.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(_CHANNEL, _EVENTS_CHANNEL)
+            await self._pubsub.close()
+        if self._leader:
+            await self.redis.eval(_RELEASE_SCRIPT, 1, _LEADER_KEY, self.node_id)
+        await self.redis.close()
+
+    async def _consume(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    if channel == _EVENTS_CHANNEL:
+                        await self._dispatch_event(json.loads(message["data"]))
+                    else:
+                        apply_snapshot(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Price bus consumer error: {e}")
+                await asyncio.sleep(1)
+
+    async def is_leader(self) -> bool:
+        if self._leader:
+            self._leader = bool(await self.redis.eval(_RENEW_SCRIPT, 1, _LEADER_KEY, self.node_id, _LEASE_MS))
+        if not self._leader:
+            self._leader = bool(await self.redis.set(_LEADER_KEY, self.node_id, nx=True, px=_LEASE_MS))
+        return self._leader
+
+    @property
+    def leader(self) -> bool:
+        return self._leader
+
+    async def publish(self, snapshot: dict):
+        payload = json.dumps(snapshot)
+        pipe = self.redis.pipeline()
+        pipe.set(_LATEST_KEY, payload)
+        pipe.publish(_CHANNEL, payload)
+        await pipe.execute()
+
+    async def publish_event(self, event: dict):
+        await self.redis.publish(_EVENTS_CHANNEL, json.dumps(event))
+
+
+_bus: PriceBus | None = None
+
+
+def create_price_bus() -> PriceBus:
+    global _bus
+    _bus = RedisPriceBus(PRICE_BUS_URL) if PRICE_BUS_URL else InProcessPriceBus()
+    return _bus
+
+
+def get_price_bus() -> PriceBus | None:
+    """The bus created for this process by the app lifespan, if any."""
+    return _bus
+
+
+async def run_price_producer(bus: PriceBus):
+    """Advance and publish prices while this replica holds leadership."""
+    was_leader = False
+    while True:
+        try:
+            leader = await bus.is_leader()
+            if leader and not was_leader:
+                # Pick up where the previous producer left off
+                seed_prices(get_market_snapshot())
+            if leader:
+                await bus.publish(produce_snapshot())
+            was_leader = leader
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Price producer error: {e}")
+            was_leader = False
+        await asyncio.sleep(TICK_INTERVAL)
+
+
+async def run_history_persister(bus: PriceBus):
+    """Periodically persist closed candles; only the producer writes, so replicas don't duplicate rows."""
+    while True:
+        await asyncio.sleep(HISTORY_PERSIST_SECONDS)
+        try:
+            if await bus.is_leader():
+                await persist_candles("1m")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Candle persistence error: {e}")
@@ -0,0 +1,60 @@
+"""
+Hacker-News-style "hot" ranking for POCs.
+
+    hot_score = upvotes / (age_hours + 2) ^ HOT_GRAVITY
+
+The score is stored on the POC and indexed so the trending page is a single
+index range read. It is recomputed server-side (a pipeline update, no
+documents shipped to the app):
+- for the POCs whose upvotes a counter flush just wrote
+- for every POC every HOT_REFRESH_SECONDS, so scores keep decaying with age
+"""
+import asyncio
+import os
+from datetime import datetime
+from beanie import PydanticObjectId
+from app.models.poc import POC
+from app.services.counter_buffer import counter_buffer
+
+HOT_GRAVITY = float(os.getenv("HOT_GRAVITY", "1.8"))
+HOT_REFRESH_SECONDS = int(os.getenv("HOT_REFRESH_SECONDS", "300"))
+
+
+def _hot_score_update(now: datetime) -> list[dict]:
+    age_hours = {"$max": [{"$divide": [{"$subtract": [now, "$created_at"]}, 3_600_000]}, 0]}
+    return [{"$set": {"hot_score": {"$divide": [
+        {"$max": ["$upvotes", 0]},
+        {"$pow": [{"$add": [age_hours, 2]}, HOT_GRAVITY]},
+    ]}}}]
+
+
+async def refresh_hot_scores(ids: list[PydanticObjectId] | None = None) -> int:
+    """Recompute hot_score for `ids` (or every upvoted POC); returns how many were modified.
+
+    Unvoted POCs score 0 at any age, so the full pass skips them, except
+    rows from before hot ranking that have no hot_score at all: keyset
+    cursors compare against the stored field, so a missing one would drop
+    those rows from every page after the first.
+    """
+    if ids is not None:
+        query = {"_id": {"$in": ids}}
+    else:
+        query = {"$or": [{"upvotes": {"$gt": 0}}, {"hot_score": {"$exists": False}}]}
+    result = await POC.get_motor_collection().update_many(query, _hot_score_update(datetime.utcnow()))
+    return result.modified_count
+
+
+async def run_hot_score_refresh():
+    """Background loop: re-decay every POC's hot_score every HOT_REFRESH_SECONDS."""
+    while True:
+        await asyncio.sleep(HOT_REFRESH_SECONDS)
+        try:
+            await refresh_hot_scores()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Hot score refresh failed: {e}")
+
+
+# Upvote flushes re-score exactly the POCs they touched
+counter_buffer.on_flush(POC, "upvotes", refresh_hot_scores)
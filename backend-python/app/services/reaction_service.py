@@ -0,0 +1,120 @@
+"""
+Likes and upvotes stored as rows in the `reactions` collection.
+
+The unique (target_type, target_id, user_id) index makes a toggle safe under
+concurrency, and the counter on the target document is only ever touched
+with an atomic $inc, so there is no read-modify-write of the target. The
+$inc itself goes through the write-behind counter buffer so hot targets
+are updated once per flush.
+
+Deltas still buffered when a process dies without a clean shutdown
+(SIGKILL, OOM) are lost, so a counter can drift from its reaction rows.
+`recount_counters()` resets every counter from `reactions`; run it with
+python -m app.migrations.counters or every COUNTER_RECOUNT_SECONDS.
+"""
+import asyncio
+import os
+from beanie import Document, PydanticObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.models.community import CommunityPost
+from app.models.poc import POC
+from app.models.reaction import Reaction
+from app.services.counter_buffer import counter_buffer
+
+COUNTER_RECOUNT_SECONDS = int(os.getenv("COUNTER_RECOUNT_SECONDS", "0"))  # 0 = CLI only
+_RECOUNT_BATCH = 1000
+
+
+async def toggle_reaction(
+    target: type[Document], target_type: str, target_id: PydanticObjectId, user_id: str, counter: str
+) -> tuple[int, bool] | None:
+    """Flip a user's reaction on a target.
+
+    Returns (counter value, reacted) or None if the target does not exist.
+    """
+    removed = await Reaction.find(
+        Reaction.target_type == target_type,
+        Reaction.target_id == target_id,
+        Reaction.user_id == user_id,
+    ).delete()
+    if removed and removed.deleted_count:
+        delta, reacted = -1, False
+    else:
+        try:
+            await Reaction(target_type=target_type, target_id=target_id, user_id=user_id).insert()
+            delta, reacted = 1, True
+        except DuplicateKeyError:
+            # A concurrent request from the same user already added it
+            delta, reacted = 0, True
+
+    # Soft-deleted targets count as gone; "deleted_at": None also matches models without the field
+    doc = await target.get_motor_collection().find_one({"_id": target_id, "deleted_at": None}, {counter: 1})
+    if doc is None:
+        await Reaction.find(
+            Reaction.target_type == target_type,
+            Reaction.target_id == target_id,
+        ).delete()
+        return None
+    counter_buffer.add(target, counter, target_id, delta)
+    return doc.get(counter, 0) + counter_buffer.pending(target, counter, target_id), reacted
+
+
+async def reacted_ids(target_type: str, target_ids: list[PydanticObjectId], user_id: str) -> set[PydanticObjectId]:
+    """Subset of `target_ids` the user has reacted to, in one indexed query."""
+    if not target_ids:
+        return set()
+    rows = await Reaction.get_motor_collection().find(
+        {"target_type": target_type, "target_id": {"$in": target_ids}, "user_id": user_id},
+        {"target_id": 1, "_id": 0},
+    ).to_list(length=None)
+    return {r["target_id"] for r in rows}
+
+
+async def recount(target: type[Document], target_type: str, counter: str) -> int:
+    """Set `counter` on every target to its number of reactions; returns how many were corrected.
+
+    Targets with deltas buffered in this process are skipped, since the flush
+    will add them on top. Each update is conditional on the value read, so a
+    flush from another replica that lands in between wins and the target is
+    picked up by the next recount instead.
+    """
+    rows = Reaction.get_motor_collection().aggregate([
+        {"$match": {"target_type": target_type}},
+        {"$group": {"_id": "$target_id", "n": {"$sum": 1}}},
+    ])
+    counts = {row["_id"]: row["n"] async for row in rows}
+    collection = target.get_motor_collection()
+    corrected = 0
+    ops = []
+    async for doc in collection.find({}, {counter: 1}):
+        stored = doc.get(counter)
+        actual = counts.get(doc["_id"], 0)
+        if stored == actual or counter_buffer.pending(target, counter, doc["_id"]):
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"], counter: stored}, {"$set": {counter: actual}}))
+        if len(ops) >= _RECOUNT_BATCH:
+            corrected += (await collection.bulk_write(ops, ordered=False)).modified_count
+            ops = []
+    if ops:
+        corrected += (await collection.bulk_write(ops, ordered=False)).modified_count
+    return corrected
+
+
+async def recount_counters() -> dict:
+    return {
+        "likes_count": await recount(CommunityPost, "post", "likes_count"),
+        "upvotes": await recount(POC, "poc", "upvotes"),
+    }
+
+
+async def run_counter_recount():
+    """Background loop: recount reaction counters every COUNTER_RECOUNT_SECONDS."""
+    while True:
+        await asyncio.sleep(COUNTER_RECOUNT_SECONDS)
+        try:
+            await recount_counters()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Counter recount failed: {e}")
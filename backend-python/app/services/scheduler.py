@@ -0,0 +1,93 @@
+"""
+Background task scheduler owned by the app lifespan.
+
+- `spawn()` runs a long-lived loop (tickers, producers, periodic refreshes).
+- `warmup()` runs a one-shot job shortly after startup, once the server is
+  already accepting traffic. Warmups marked `required` gate readiness and
+  are retried with capped exponential backoff until they succeed, so a
+  transient failure (e.g. Mongo briefly unreachable) cannot leave the
+  replica live but never ready.
+
+All tasks are cancelled together on shutdown.
+"""
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable
+
+WARMUP_DELAY_SECONDS = float(os.getenv("WARMUP_DELAY_SECONDS", "0.5"))
+WARMUP_RETRY_BASE_SECONDS = float(os.getenv("WARMUP_RETRY_BASE_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "60"))
+
+
+class BackgroundScheduler:
+    def __init__(self):
+        self._tasks: dict[str, asyncio.Task] = {}
+        # name -> {"state", "required", "attempts", "duration_ms", "error"}
+        self._warmups: dict[str, dict] = {}
+        self.started_at: float | None = None
+
+    def spawn(self, name: str, fn: Callable[[], Awaitable]):
+        self._tasks[name] = asyncio.create_task(fn(), name=name)
+
+    def warmup(self, name: str, fn: Callable[[], Awaitable], required: bool = False):
+        self._warmups[name] = {
+            "state": "pending", "required": required, "attempts": 0, "duration_ms": None, "error": None,
+        }
+        self._tasks[f"warmup:{name}"] = asyncio.create_task(self._run_warmup(name, fn), name=f"warmup:{name}")
+
+    async def _run_warmup(self, name: str, fn: Callable[[], Awaitable]):
+        # Let the lifespan finish so the server binds before warmups compete for the loop
+        await asyncio.sleep(WARMUP_DELAY_SECONDS)
+        status = self._warmups[name]
+        delay = WARMUP_RETRY_BASE_SECONDS
+        while True:
+            status["state"] = "running"
+            status["attempts"] += 1
+            started = time.perf_counter()
+            try:
+                await fn()
+                status["state"] = "done"
+                status["error"] = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                status["state"] = "failed"
+                status["error"] = str(e)
+                print(f"Warmup {name} failed (attempt {status['attempts']}): {e}")
+            status["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            if status["state"] == "done" or not status["required"]:
+                return
+            status["state"] = "retrying"
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+
+    def start(self):
+        self.started_at = time.time()
+
+    @property
+    def ready(self) -> bool:
+        return self.started_at is not None and all(
+            w["state"] == "done" for w in self._warmups.values() if w["required"]
+        )
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+            "warmups": {name: dict(w) for name, w in self._warmups.items()},
+            "tasks": {
+                name: "running" if not t.done() else "cancelled" if t.cancelled() else "finished"
+                for name, t in self._tasks.items()
+                if not name.startswith("warmup:")
+            },
+        }
+
+    async def shutdown(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+
+scheduler = BackgroundScheduler()
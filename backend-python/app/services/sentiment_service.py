@@ -1,36 +1,151 @@
 """
 Sentiment analysis using TextBlob on article text.
 Returns a score in [-1, 1] and a label.
+
+Scores are memoized by content hash, so a title/summary seen before (across
+sources or ingestion runs) is never rescored. The market-wide score is a
+rolling window over the most recent stored articles, reloaded from Mongo
+after every ingestion pass (on every replica, whichever one inserted the
+rows) and read by /market/sentiment without touching Mongo.
 """
+import os
+import hashlib
+import threading
+from collections import OrderedDict, deque
 from textblob import TextBlob
 from app.models.market import NewsArticle
 
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "4096"))
+SENTIMENT_WINDOW = int(os.getenv("SENTIMENT_WINDOW", "20"))
 
-def analyze_text(text: str) -> tuple[float, str]:
-    """Returns (polarity_score, label)."""
+
+def _label(score: float) -> str:
+    if score > 0.1:
+        return "positive"
+    if score < -0.1:
+        return "negative"
+    return "neutral"
+
+
+def _score(text: str) -> float:
     try:
-        blob = TextBlob(text)
-        score = round(blob.sentiment.polarity, 3)
+        return round(TextBlob(text).sentiment.polarity, 3)
     except Exception:
-        score = 0.0
+        return 0.0
 
-    if score > 0.1:
-        label = "positive"
-    elif score < -0.1:
-        label = "negative"
-    else:
-        label = "neutral"
 
-    return score, label
+class _ScoreCache:
+    """LRU of content hash -> polarity; batches may be scored off the event loop."""
 
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-async def get_market_sentiment_score() -> float:
-    """Aggregate sentiment score from recent news articles."""
-    try:
-        articles = await NewsArticle.find_all().sort(-NewsArticle.scraped_at).limit(20).to_list()
-        if not articles:
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.sha1(" ".join(text.split()).lower().encode()).digest()
+
+    def get(self, key: bytes) -> float | None:
+        with self._lock:
+            score = self._entries.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key: bytes, score: float):
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = _ScoreCache(SENTIMENT_CACHE_SIZE)
+
+
+def analyze_texts(texts: list[str]) -> list[tuple[float, str]]:
+    """Score a batch; repeated and previously seen texts are scored once."""
+    keys = [_cache.key(t) for t in texts]
+    scored: dict[bytes, float] = {}
+    for key, text in zip(keys, texts):
+        if key in scored:
+            continue
+        score = _cache.get(key)
+        if score is None:
+            score = _score(text)
+            _cache.put(key, score)
+        scored[key] = score
+    return [(scored[k], _label(scored[k])) for k in keys]
+
+
+def analyze_text(text: str) -> tuple[float, str]:
+    """Returns (polarity_score, label)."""
+    return analyze_texts([text])[0]
+
+
+class _SentimentWindow:
+    """Running mean over the last `size` ingested article scores."""
+
+    def __init__(self, size: int):
+        self._scores: deque[float] = deque(maxlen=size)
+        self._total = 0.0
+        self.version = 0
+
+    def push(self, scores: list[float]):
+        for score in scores:
+            if len(self._scores) == self._scores.maxlen:
+                self._total -= self._scores[0]
+            self._scores.append(score)
+            self._total += score
+        self.version += 1
+
+    def reset(self, scores: list[float]):
+        if list(self._scores) == scores:
+            return  # unchanged: keep the version so cached responses stay valid
+        self._scores.clear()
+        self._total = 0.0
+        self.push(scores)
+
+    @property
+    def score(self) -> float:
+        if not self._scores:
             return 0.0
-        scores = [a.sentiment_score for a in articles]
-        return round(sum(scores) / len(scores), 3)
-    except Exception:
-        return 0.12  # Slightly positive default
+        return round(self._total / len(self._scores), 3)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+_window = _SentimentWindow(SENTIMENT_WINDOW)
+
+
+async def load_sentiment_window():
+    """(Re)seed the window from the latest stored articles."""
+    rows = await NewsArticle.get_motor_collection().find(
+        {}, {"sentiment_score": 1, "_id": 0}
+    ).sort("scraped_at", -1).limit(SENTIMENT_WINDOW).to_list(length=None)
+    # Oldest first so later pushes evict in arrival order
+    _window.reset([r.get("sentiment_score", 0.0) for r in reversed(rows)])
+
+
+def get_market_sentiment_score() -> float:
+    """Aggregate sentiment score over the rolling window of recent articles."""
+    return _window.score
+
+
+def sentiment_version() -> int:
+    """Bumped whenever the rolling window changes."""
+    return _window.version
+
+
+def sentiment_stats() -> dict:
+    return {"cache": _cache.stats(), "window_size": len(_window), "score": _window.score}
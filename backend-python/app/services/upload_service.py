@@ -0,0 +1,135 @@
+"""
+Streaming upload handling shared by avatar and community uploads.
+
+Starlette's multipart parser spools the whole request body before a
+handler runs, so the size limits are enforced in front of it:
+UploadLimitMiddleware rejects an upload route's request with 413 from its
+Content-Length alone, or as soon as a streamed (chunked) body crosses the
+route's cap, before any of it reaches the parser.
+
+The parsed file is then copied in CHUNK_SIZE pieces to a temp file in the
+upload directory on a worker thread, so neither the whole file nor the
+blocking disk I/O ever sits on the event loop. The per-kind limit is
+checked again while copying, and the SHA-256 computed on the same pass is
+the key the finished file is handed to the blob store under.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from app.services.blob_store import UPLOAD_DIR, store_blob
+
+CHUNK_SIZE = 1024 * 1024
+
+_MB = 1024 * 1024
+MAX_UPLOAD_BYTES = {
+    "avatar": int(os.getenv("UPLOAD_MAX_AVATAR_MB", "5")) * _MB,
+    "image": int(os.getenv("UPLOAD_MAX_IMAGE_MB", "10")) * _MB,
+    "file": int(os.getenv("UPLOAD_MAX_FILE_MB", "50")) * _MB,
+}
+
+
+# Multipart boundaries, part headers and small form fields
+_FORM_OVERHEAD = 64 * 1024
+
+
+def request_limit(*kinds: str) -> int:
+    """Largest acceptable request body for a route carrying these upload kinds."""
+    return sum(MAX_UPLOAD_BYTES[k] for k in kinds) + _FORM_OVERHEAD
+
+
+class UploadLimitMiddleware:
+    """ASGI guard capping request bodies on upload routes before they are parsed."""
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits  # path -> max body bytes (POST/PUT only)
+
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http" and scope["method"] in ("POST", "PUT"):
+            limit = self.limits.get(scope["path"])
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        too_large = f"Request body exceeds the {limit // _MB}MB limit for this upload"
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            response = PlainTextResponse(too_large, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def capped_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Surfaces through request.form() as a 413 response
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=too_large)
+            return message
+
+        await self.app(scope, capped_receive, send)
+
+
+class StoredUpload(BaseModel):
+    url: str
+    size: int
+    sha256: str
+    filename: str
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _copy(source, tmp_path: str, limit: int) -> tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            while chunk := source.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > limit:
+                    raise _TooLarge()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size, digest.hexdigest()
+
+
+def upload_extension(upload: UploadFile) -> str:
+    return os.path.splitext(upload.filename or "")[1].lower()
+
+
+async def save_upload(upload: UploadFile, kind: str) -> StoredUpload:
+    """Stream an upload into the blob store and return where it landed."""
+    limit = MAX_UPLOAD_BYTES[kind]
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the {limit // _MB}MB limit for {kind} uploads",
+    )
+    # Reject early when the multipart parser already knows the size
+    if upload.size is not None and upload.size > limit:
+        raise too_large
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    ext = upload_extension(upload)
+    tmp_path = os.path.join(UPLOAD_DIR, f".tmp-{uuid.uuid4()}{ext}")
+    try:
+        size, sha256 = await asyncio.to_thread(_copy, upload.file, tmp_path, limit)
+    except _TooLarge:
+        raise too_large
+    try:
+        url = await store_blob(tmp_path, sha256, ext, size)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return StoredUpload(url=url, size=size, sha256=sha256, filename=upload.filename or f"{sha256}{ext}")
@@ -1,48 +1,284 @@
 """
-WebSocket endpoint that broadcasts live market ticks every second.
+WebSocket endpoint that broadcasts live market ticks.
 Clients connect to ws://localhost:8000/ws/market
+
+A single background producer (`run_market_ticker`, started from the app
+lifespan) builds each snapshot once, serializes it once and fans the same
+frame out to every connected socket.
+
+Protocol:
+- Clients that never subscribe receive a full `tick` frame (all tickers)
+  on every tick.
+- {"action": "subscribe", "tickers": ["PAYTM", "ZOMATO"]} switches the
+  socket to per-ticker mode. It receives one `snapshot` frame with the full
+  state of the newly subscribed tickers, then `delta` frames holding only
+  the fields that changed for its tickers.
+- {"action": "unsubscribe", "tickers": [...]} stops updates for tickers.
+- Sockets opened with ?token=<jwt> also receive `alert` frames when one of
+  the user's MarketAlerts triggers. Alerts are evaluated only on the
+  replica that holds price leadership; fired alerts arrive on every replica
+  over the price bus and each one delivers to its own sockets.
 """
 import asyncio
 import json
 from fastapi import WebSocket, WebSocketDisconnect
-from app.services.market_service import get_market_snapshot
-from app.models.market import MarketAlert
-from app.services.market_service import get_price
+from app.auth import decode_token_subject
+from app.services.market_service import get_market_snapshot, is_ticker
+from app.services.alert_engine import alert_engine, mark_triggered
+from app.services.price_bus import PriceBus
+
+TICK_INTERVAL = 1.5  # seconds between broadcast frames
+SEND_TIMEOUT = 1.0  # seconds a single client may take to accept a frame
+CLOSE_TIMEOUT = 5.0  # seconds a dropped client gets to complete the close handshake
+
+_DELTA_FIELDS = ("price", "change", "change_pct", "direction")
+
+
+def _diff(previous: dict, current: dict) -> dict:
+    """Per-ticker dict of fields that changed between two snapshots."""
+    changed = {}
+    for ticker, info in current.items():
+        before = previous.get(ticker)
+        if before is None:
+            changed[ticker] = info
+            continue
+        fields = {f: info[f] for f in _DELTA_FIELDS if info[f] != before.get(f)}
+        if fields:
+            fields["timestamp"] = info["timestamp"]
+            changed[ticker] = fields
+    return changed
 
 
 class MarketConnectionManager:
     def __init__(self):
-        self.active: list[WebSocket] = []
+        self.active: set[WebSocket] = set()
+        # ticker -> sockets subscribed to it
+        self.subscribers: dict[str, set[WebSocket]] = {}
+        # socket -> tickers it subscribed to (only sockets in per-ticker mode)
+        self.subscriptions: dict[WebSocket, set[str]] = {}
+        # user id -> authenticated sockets, for alert delivery
+        self.users: dict[str, set[WebSocket]] = {}
+        self._socket_users: dict[WebSocket, str] = {}
+        self._last_snapshot: dict = {}
+        # Close handshakes of dropped sockets, kept referenced until they finish
+        self._closing: set[asyncio.Task] = set()
 
-    async def connect(self, ws: WebSocket):
+    async def connect(self, ws: WebSocket, user_id: str | None = None):
         await ws.accept()
-        self.active.append(ws)
+        self.active.add(ws)
+        if user_id:
+            self.users.setdefault(user_id, set()).add(ws)
+            self._socket_users[ws] = user_id
 
     def disconnect(self, ws: WebSocket):
-        if ws in self.active:
-            self.active.remove(ws)
+        self.active.discard(ws)
+        user_id = self._socket_users.pop(ws, None)
+        if user_id is not None:
+            sockets = self.users.get(user_id)
+            if sockets is not None:
+                sockets.discard(ws)
+                if not sockets:
+                    del self.users[user_id]
+        for ticker in self.subscriptions.pop(ws, ()):
+            subs = self.subscribers.get(ticker)
+            if subs is not None:
+                subs.discard(ws)
+                if not subs:
+                    del self.subscribers[ticker]
+
+    def advance(self, snapshot: dict):
+        """Move the delta baseline without sending anything."""
+        self._last_snapshot = snapshot
+
+    def current_snapshot(self) -> dict:
+        """Last broadcast state, so new subscribers share the delta baseline."""
+        if not self._last_snapshot:
+            self._last_snapshot = get_market_snapshot()
+        return self._last_snapshot
+
+    def subscribe(self, ws: WebSocket, tickers: list[str]) -> list[str]:
+        """Subscribe a socket; returns the tickers that were newly added."""
+        if ws not in self.active:
+            return []  # already dropped; re-registering would leak it
+        mine = self.subscriptions.setdefault(ws, set())
+        added = []
+        for ticker in tickers:
+            ticker = str(ticker).upper()
+            if is_ticker(ticker) and ticker not in mine:
+                mine.add(ticker)
+                self.subscribers.setdefault(ticker, set()).add(ws)
+                added.append(ticker)
+        return added
+
+    def unsubscribe(self, ws: WebSocket, tickers: list[str]):
+        mine = self.subscriptions.get(ws)
+        if mine is None:
+            return
+        for ticker in tickers:
+            ticker = str(ticker).upper()
+            mine.discard(ticker)
+            subs = self.subscribers.get(ticker)
+            if subs is not None:
+                subs.discard(ws)
+                if not subs:
+                    del self.subscribers[ticker]
+
+    async def _send(self, ws: WebSocket, payload: str) -> bool:
+        try:
+            await asyncio.wait_for(ws.send_text(payload), timeout=SEND_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    async def _close(ws: WebSocket):
+        try:
+            await asyncio.wait_for(ws.close(code=1013), timeout=CLOSE_TIMEOUT)
+        except Exception:
+            pass
+
+    def drop(self, ws: WebSocket):
+        """Disconnect a failed or slow client and close it in the background.
+
+        A send that timed out may have left a partial frame on the wire, so
+        the socket cannot be reused; 1013 (try again later) tells the client
+        to reconnect.
+        """
+        if ws not in self.active:
+            return
+        self.disconnect(ws)
+        task = asyncio.create_task(self._close(ws))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _send_all(self, frames: list[tuple[WebSocket, str]]):
+        """Send pre-serialized frames concurrently, dropping failed or slow clients."""
+        if not frames:
+            return
+        results = await asyncio.gather(*(self._send(ws, payload) for ws, payload in frames))
+        for (ws, _), ok in zip(frames, results):
+            if not ok:
+                self.drop(ws)
+
+    async def broadcast_text(self, payload: str):
+        """Send an already-serialized frame to every socket concurrently.
+
+        Clients that error out or miss the send timeout are dropped and closed
+        so one slow consumer never stalls the rest of the fan-out.
+        """
+        await self._send_all([(ws, payload) for ws in self.active])
 
     async def broadcast(self, data: dict):
-        dead = []
-        for ws in self.active:
-            try:
-                await ws.send_json(data)
-            except Exception:
-                dead.append(ws)
-        for ws in dead:
-            self.disconnect(ws)
+        await self.broadcast_text(json.dumps(data))
+
+    async def publish_tick(self, snapshot: dict):
+        """Fan a new snapshot out: full frames to legacy sockets, deltas to subscribers."""
+        changed = _diff(self._last_snapshot, snapshot)
+        self._last_snapshot = snapshot
+        frames: list[tuple[WebSocket, str]] = []
+
+        legacy = [ws for ws in self.active if ws not in self.subscriptions]
+        if legacy:
+            full = json.dumps({"type": "tick", "data": snapshot})
+            frames.extend((ws, full) for ws in legacy)
+
+        if changed and self.subscribers:
+            # Each ticker's delta is encoded once and reused for every subscriber
+            per_socket: dict[WebSocket, list[str]] = {}
+            for ticker, fields in changed.items():
+                subs = self.subscribers.get(ticker)
+                if not subs:
+                    continue
+                fragment = f"{json.dumps(ticker)}:{json.dumps(fields)}"
+                for ws in subs:
+                    per_socket.setdefault(ws, []).append(fragment)
+            # Sockets with the same subscription set share one frame
+            encoded: dict[tuple[str, ...], str] = {}
+            for ws, parts in per_socket.items():
+                key = tuple(parts)
+                frame = encoded.get(key)
+                if frame is None:
+                    frame = '{"type": "delta", "data": {' + ", ".join(parts) + "}}"
+                    encoded[key] = frame
+                frames.append((ws, frame))
+
+        await self._send_all(frames)
+
+    async def push_alerts(self, fired: list[dict]):
+        """Deliver triggered alerts to their owners' sockets."""
+        frames: list[tuple[WebSocket, str]] = []
+        for alert in fired:
+            sockets = self.users.get(alert["user_id"])
+            if not sockets:
+                continue
+            frame = json.dumps({"type": "alert", "data": alert})
+            frames.extend((ws, frame) for ws in sockets)
+        await self._send_all(frames)
 
 
 manager = MarketConnectionManager()
 
 
+async def _on_bus_event(event: dict):
+    fired = alert_engine.apply_event(event)
+    if fired:
+        await manager.push_alerts(fired)
+
+
+async def run_market_ticker(bus: PriceBus):
+    """Background tick producer: one snapshot and one encode per tick."""
+    bus.on_event(_on_bus_event)
+    while True:
+        try:
+            snapshot = get_market_snapshot()
+            if manager.active:
+                await manager.publish_tick(snapshot)
+            else:
+                # Keep the baseline fresh so the next client never starts from stale prices
+                manager.advance(snapshot)
+            # Leadership is refreshed by the price producer; one evaluator cluster-wide
+            if bus.leader:
+                fired = alert_engine.evaluate({t: info["price"] for t, info in snapshot.items()})
+                if fired:
+                    await mark_triggered(fired)
+                    await bus.publish_event({"type": "alerts_fired", "alerts": fired})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Market ticker error: {e}")
+        await asyncio.sleep(TICK_INTERVAL)
+
+
+async def _handle_message(websocket: WebSocket, raw: str):
+    try:
+        msg = json.loads(raw)
+        action = msg.get("action")
+        tickers = msg.get("tickers") or []
+        if not isinstance(tickers, list):
+            tickers = [tickers]
+    except (ValueError, AttributeError):
+        await websocket.send_json({"type": "error", "detail": "Invalid message"})
+        return
+
+    if action == "subscribe":
+        added = manager.subscribe(websocket, tickers)
+        snapshot = manager.current_snapshot()
+        await websocket.send_json({"type": "snapshot", "data": {t: snapshot[t] for t in added if t in snapshot}})
+    elif action == "unsubscribe":
+        manager.unsubscribe(websocket, tickers)
+    else:
+        await websocket.send_json({"type": "error", "detail": f"Unknown action: {action}"})
+
+
 async def market_ws_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    token = websocket.query_params.get("token")
+    await manager.connect(websocket, decode_token_subject(token) if token else None)
     try:
-        while True:
-            snapshot = get_market_snapshot()
-            await websocket.send_json({"type": "tick", "data": snapshot})
-            await asyncio.sleep(1.5)
+        # Send the current state right away instead of waiting for the next tick
+        await websocket.send_json({"type": "tick", "data": manager.current_snapshot()})
+        # Ticks are pushed by run_market_ticker; here we only handle client messages
+        while websocket in manager.active:
+            await _handle_message(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception:
@@ -5,20 +5,55 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.database import init_db
-from app.api.v1 import auth, market, poc, jobs, funding, community,schedule
-from app.sockets.market_socket import market_ws_endpoint
-from app.services.news_scraper import scrape_and_store
+from app.api.v1 import auth, market, poc, jobs, funding, community,schedule, ops
+from app.sockets.market_socket import market_ws_endpoint, run_market_ticker
+from app.services.news_scraper import run_news_ingestion, warm_news
+from app.services.scheduler import scheduler
+from app.services.matching_service import build_indexes, run_matching_refresh
+from app.services.ranking_service import refresh_hot_scores, run_hot_score_refresh
+from app.services.post_reaper import run_post_reaper, run_orphan_sweeper, ORPHAN_SWEEP_SECONDS
+from app.services.alert_engine import alert_engine
+from app.services.counter_buffer import counter_buffer
+from app.services.reaction_service import run_counter_recount, COUNTER_RECOUNT_SECONDS
+from app.services.upload_service import UploadLimitMiddleware, request_limit
+from app.services.price_bus import (
+    create_price_bus, run_price_producer, run_history_persister, HISTORY_PERSIST_SECONDS,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
-    # Kick off initial news scrape on startup (non-blocking)
-    try:
-        await scrape_and_store()
-    except Exception:
-        pass
+    counter_buffer.start()
+    price_bus = create_price_bus()
+    await price_bus.start()
+    scheduler.start()
+    # Prices are produced by the elected replica and consumed everywhere
+    scheduler.spawn("price_producer", lambda: run_price_producer(price_bus))
+    if HISTORY_PERSIST_SECONDS > 0:
+        scheduler.spawn("history_persister", lambda: run_history_persister(price_bus))
+    # Single shared producer for /ws/market ticks; alerts are evaluated on the price leader
+    scheduler.spawn("market_ticker", lambda: run_market_ticker(price_bus))
+    # Warmups run once the server is accepting traffic; only alerts gate readiness
+    scheduler.warmup("alert_index", alert_engine.load, required=True)
+    scheduler.warmup("news_ingestion", warm_news)
+    scheduler.spawn("news_refresh", run_news_ingestion)
+    scheduler.warmup("matching_index", build_indexes)
+    scheduler.spawn("matching_refresh", run_matching_refresh)
+    scheduler.warmup("hot_scores", refresh_hot_scores)
+    scheduler.spawn("hot_score_refresh", run_hot_score_refresh)
+    # Cascade cleanup for soft-deleted posts; the orphan file sweep is opt-in
+    scheduler.spawn("post_reaper", run_post_reaper)
+    if ORPHAN_SWEEP_SECONDS > 0:
+        scheduler.spawn("orphan_sweeper", run_orphan_sweeper)
+    # Repairs like/upvote counters that lost buffered deltas to a killed process
+    if COUNTER_RECOUNT_SECONDS > 0:
+        scheduler.spawn("counter_recount", run_counter_recount)
     yield
+    await scheduler.shutdown()
+    await price_bus.stop()
+    # Write out buffered like/upvote deltas before the process exits
+    await counter_buffer.stop()
 
 
 app = FastAPI(
@@ -28,6 +63,15 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Upload bodies are capped before the multipart parser spools them to disk
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/server/api/v1/auth/avatar": request_limit("avatar"),
+        "/server/api/v1/community/": request_limit("image", "file"),
+    },
+)
+
 # CORS — allow Next.js dev server
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +79,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 from fastapi.responses import JSONResponse
@@ -56,6 +101,7 @@ app.include_router(jobs.router, prefix="/server/api/v1")
 app.include_router(funding.router, prefix="/server/api/v1")
 app.include_router(community.router, prefix="/server/api/v1")
 app.include_router(schedule.router, prefix="/server/api/v1")
+app.include_router(ops.router, prefix="/server/api/v1")
 
 # Static files for uploads
 os.makedirs("uploads", exist_ok=True)
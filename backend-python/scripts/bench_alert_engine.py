@@ -0,0 +1,90 @@
+"""
+Alert engine benchmark: evaluate() against 1M alerts spread over the tickers.
+
+Alerts are generated the way users set them: "above" thresholds up to
+--spread above the current price and "below" thresholds as far under it,
+split evenly across tickers and directions. The index is built the way
+AlertEngine.load builds it (append, then one sort per list). The script
+then drives --ticks random-walk ticks through evaluate() and reports the
+per-tick cost and how many alerts fired. For reference it times one
+linear scan over all alerts, which is what each tick cost before the
+sorted index.
+
+    python scripts/bench_alert_engine.py --alerts 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import market_service  # noqa: E402
+from app.services.alert_engine import AlertEngine  # noqa: E402
+
+
+def _build(engine: AlertEngine, prices: dict[str, float], count: int, spread: float):
+    tickers = list(prices)
+    for n in range(count):
+        ticker = tickers[n % len(tickers)]
+        direction = "above" if n % 2 else "below"
+        offset = random.uniform(0.0005, spread) * prices[ticker]
+        threshold = round(prices[ticker] + offset if direction == "above" else prices[ticker] - offset, 2)
+        alert_id = f"{n:024x}"
+        engine._alerts[alert_id] = (ticker, direction, threshold, "u")
+        engine._index.setdefault((ticker, direction), []).append((threshold, alert_id))
+    for entries in engine._index.values():
+        entries.sort()
+
+
+def _scan(alerts: dict, prices: dict[str, float]) -> int:
+    fired = 0
+    for ticker, direction, threshold, _ in alerts.values():
+        price = prices[ticker]
+        if (direction == "above" and price >= threshold) or (direction == "below" and price <= threshold):
+            fired += 1
+    return fired
+
+
+def main(count: int, ticks: int, spread: float) -> int:
+    prices = market_service.get_prices()
+    engine = AlertEngine()
+    started = time.perf_counter()
+    _build(engine, prices, count, spread)
+    print(f"{count:,} alerts over {len(prices)} tickers, built and sorted in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    _scan(engine._alerts, prices)
+    print(f"linear scan (old approach): {(time.perf_counter() - started) * 1000:.1f}ms per tick")
+
+    timings, fired_total = [], 0
+    for _ in range(ticks):
+        market_service.apply_snapshot(market_service.produce_snapshot())
+        tick = market_service.get_prices()
+        started = time.perf_counter()
+        fired = engine.evaluate(tick)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+        fired_total += len(fired)
+    timings.sort()
+    print(
+        f"evaluate(): {ticks} ticks, median {timings[len(timings) // 2]:.0f}us, "
+        f"max {timings[-1]:.0f}us, {fired_total:,} fired ({fired_total / ticks:.0f}/tick), "
+        f"{len(engine):,} left"
+    )
+
+    # Worst case: a 10% gap up on every ticker at once
+    gap = {t: p * 1.1 for t, p in market_service.get_prices().items()}
+    started = time.perf_counter()
+    fired = engine.evaluate(gap)
+    print(f"10% gap up: {len(fired):,} fired in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--spread", type=float, default=0.2, help="max threshold distance as a fraction of price")
+    args = parser.parse_args()
+    sys.exit(main(args.alerts, args.ticks, args.spread))
@@ -0,0 +1,91 @@
+"""
+Login storm benchmark: event-loop lag while many logins verify passwords.
+
+Fires --logins concurrent password checks against one bcrypt hash at the
+configured BCRYPT_ROUNDS, twice:
+
+- inline: verify_password called straight from the coroutine, as the login
+  route did before, so every bcrypt run blocks the event loop
+- pool: verify_password_async, which runs bcrypt on the password thread pool
+  and turns callers beyond PASSWORD_QUEUE_LIMIT into 503s
+
+A monitor task sleeps --interval-ms in a loop and records how late it wakes
+up, which is the delay every other request on the worker would see. Reports
+wall time, rejected logins and p50/p99/max loop lag for each mode.
+
+    BCRYPT_ROUNDS=12 python scripts/bench_login_lag.py --logins 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException  # noqa: E402
+from app.auth import BCRYPT_ROUNDS, PASSWORD_WORKERS, hash_password, verify_password, verify_password_async  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _monitor(interval: float, lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def _login_inline(hashed: str) -> bool:
+    return verify_password(PASSWORD, hashed)
+
+
+async def _login_pool(hashed: str) -> bool:
+    try:
+        ok, _ = await verify_password_async(PASSWORD, hashed)
+        return ok
+    except HTTPException:
+        return False
+
+
+async def _storm(login, hashed: str, logins: int, interval: float) -> dict:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor(interval, lags, stop))
+    await asyncio.sleep(interval * 5)  # idle baseline samples
+    began = time.perf_counter()
+    results = await asyncio.gather(*(login(hashed) for _ in range(logins)))
+    wall = time.perf_counter() - began
+    await asyncio.sleep(interval * 5)
+    stop.set()
+    await monitor
+    return {"wall": wall, "rejected": results.count(False), "lags": lags}
+
+
+async def main(logins: int, interval_ms: float) -> int:
+    hashed = hash_password(PASSWORD)
+    interval = interval_ms / 1000
+    print(f"{logins} concurrent logins, bcrypt cost {BCRYPT_ROUNDS}, {PASSWORD_WORKERS} pool workers, "
+          f"loop probe every {interval_ms:.0f}ms")
+    print(f"{'mode':>7} {'wall':>8} {'rejected':>9} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}")
+    for name, login in (("inline", _login_inline), ("pool", _login_pool)):
+        r = await _storm(login, hashed, logins, interval)
+        lags = r["lags"]
+        print(
+            f"{name:>7} {r['wall']:>7.2f}s {r['rejected']:>9} {_percentile(lags, 50):>7.1f}ms "
+            f"{_percentile(lags, 99):>7.1f}ms {max(lags):>7.1f}ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--interval-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.logins, args.interval_ms)))
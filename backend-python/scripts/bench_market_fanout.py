@@ -0,0 +1,135 @@
+"""
+Market tick fan-out benchmark: per-tick CPU and delivery latency at 1k-5k sockets.
+
+Simulated sockets accept frames in-process (each send yields to the event
+loop once, like a socket whose buffer has room), so the numbers are the
+server's own cost. Two producers are compared on the same sockets:
+
+- per-socket: the original design, where every connection rebuilt the
+  snapshot (one isoformat per ticker) and JSON-encoded it for itself
+- shared: MarketConnectionManager.publish_tick, where one snapshot and one
+  encode are fanned out concurrently with a per-send timeout
+
+For each socket count it reports CPU per tick, the fan-out time until the
+last socket has its frame, and p50/p99 per-socket delivery latency.
+--slow-pct makes that share of sockets stall past SEND_TIMEOUT to show
+they are dropped without holding up the rest.
+
+    python scripts/bench_market_fanout.py --sockets 1000 2000 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import market_service  # noqa: E402
+from app.sockets.market_socket import MarketConnectionManager, SEND_TIMEOUT  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self, stall: float = 0.0):
+        self.stall = stall
+        self.delivered: list[float] = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload: str):
+        await asyncio.sleep(self.stall)
+        self.delivered.append(time.perf_counter())
+
+    async def send_json(self, data: dict):
+        await self.send_text(json.dumps(data))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def _legacy_snapshot(prices: dict[str, float], base: dict[str, float]) -> dict:
+    """The pre-fan-out snapshot: rebuilt per socket, one isoformat per ticker."""
+    snapshot = {}
+    for ticker, price in prices.items():
+        change = round(price - base[ticker], 2)
+        snapshot[ticker] = {
+            "price": price,
+            "change": change,
+            "change_pct": round((change / base[ticker]) * 100, 2),
+            "direction": "up" if change >= 0 else "down",
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+    return snapshot
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _run(mode: str, count: int, ticks: int, slow_pct: float) -> dict:
+    stall = SEND_TIMEOUT * 2
+    sockets = [FakeSocket(stall if random.random() < slow_pct / 100 else 0.0) for _ in range(count)]
+    manager = MarketConnectionManager()
+    for ws in sockets:
+        await manager.connect(ws)
+    base = dict(market_service._BASE)
+
+    cpu, fanout, latencies = [], [], []
+    for _ in range(ticks):
+        market_service.apply_snapshot(market_service.produce_snapshot())
+        for ws in sockets:
+            ws.delivered.clear()
+        cpu_start, start = time.process_time(), time.perf_counter()
+        if mode == "shared":
+            await manager.publish_tick(market_service.get_market_snapshot())
+        else:
+            prices = market_service.get_prices()
+
+            async def send_own(ws):
+                try:
+                    await asyncio.wait_for(
+                        ws.send_json({"type": "tick", "data": _legacy_snapshot(prices, base)}), timeout=SEND_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+            await asyncio.gather(*(send_own(ws) for ws in sockets))
+        cpu.append((time.process_time() - cpu_start) * 1000)
+        done = [t for ws in sockets for t in ws.delivered]
+        if done:
+            fanout.append((max(done) - start) * 1000)
+            latencies.extend((t - start) * 1000 for t in done)
+    return {
+        "cpu_ms": sum(cpu) / len(cpu),
+        "fanout_ms": sum(fanout) / len(fanout) if fanout else 0.0,
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+        "connected": len(manager.active) if mode == "shared" else count,
+    }
+
+
+async def main(counts: list[int], ticks: int, slow_pct: float) -> int:
+    print(f"{len(market_service.get_tickers())} tickers, {ticks} ticks per run, {slow_pct}% stalled sockets")
+    print(f"{'sockets':>8} {'producer':>11} {'cpu/tick':>10} {'fan-out':>10} {'p50':>9} {'p99':>9} {'left':>6}")
+    for count in counts:
+        for mode in ("per-socket", "shared"):
+            r = await _run(mode, count, ticks, slow_pct)
+            print(
+                f"{count:>8} {mode:>11} {r['cpu_ms']:>8.1f}ms {r['fanout_ms']:>8.1f}ms "
+                f"{r['p50_ms']:>7.2f}ms {r['p99_ms']:>7.2f}ms {r['connected']:>6}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sockets", type=int, nargs="+", default=[1000, 2000, 5000])
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--slow-pct", type=float, default=0.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.sockets, args.ticks, args.slow_pct)))
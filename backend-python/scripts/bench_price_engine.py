@@ -0,0 +1,91 @@
+"""
+Price engine benchmark: tick and snapshot cost at 10, 1k and 10k tickers.
+
+Compares the vectorized producer in market_service (numpy arrays advanced
+in place, converted with tolist()) against the dict-per-ticker producer it
+replaced, copied below as LegacyProducer. Both run the same synthetic
+universe. For each size it reports the mean time for a bare price tick and
+for a full produce_snapshot().
+
+    python scripts/bench_price_engine.py --tickers 10 1000 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import market_service  # noqa: E402
+
+
+class LegacyProducer:
+    """The pre-numpy producer: one random draw and one round() per ticker."""
+
+    def __init__(self, base_prices: dict[str, float]):
+        self.base = dict(base_prices)
+        self.last = dict(base_prices)
+
+    def tick_prices(self):
+        for k in self.last:
+            change = random.uniform(-0.003, 0.003)
+            self.last[k] = round(self.last[k] * (1 + change), 2)
+
+    def produce_snapshot(self) -> dict:
+        self.tick_prices()
+        snapshot = {}
+        timestamp = datetime.utcnow().isoformat()
+        for ticker, price in self.last.items():
+            base = self.base[ticker]
+            change = round(price - base, 2)
+            change_pct = round((change / base) * 100, 2)
+            snapshot[ticker] = {
+                "price": price,
+                "change": change,
+                "change_pct": change_pct,
+                "direction": "up" if change >= 0 else "down",
+                "timestamp": timestamp,
+            }
+        return snapshot
+
+
+def _universe(count: int) -> dict[str, float]:
+    return {f"SYM{i:05d}": round(random.uniform(50, 50_000), 2) for i in range(count)}
+
+
+def _mean_us(fn, rounds: int) -> float:
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1_000_000
+
+
+def main(counts: list[int], rounds: int) -> int:
+    print(f"{rounds} rounds per measurement, mean per call")
+    print(f"{'tickers':>8} {'producer':>8} {'tick':>11} {'snapshot':>11}")
+    for count in counts:
+        base = _universe(count)
+        legacy = LegacyProducer(base)
+        market_service.set_universe(base)
+        results = {
+            "dict": (_mean_us(legacy.tick_prices, rounds), _mean_us(legacy.produce_snapshot, rounds)),
+            "numpy": (
+                _mean_us(market_service._tick_prices, rounds),
+                _mean_us(market_service.produce_snapshot, rounds),
+            ),
+        }
+        for name, (tick, snapshot) in results.items():
+            print(f"{count:>8} {name:>8} {tick:>9.1f}us {snapshot:>9.1f}us")
+    market_service.set_universe(market_service._BASE)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[10, 1000, 10_000])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(main(args.tickers, args.rounds))
@@ -0,0 +1,119 @@
+"""
+Startup benchmark: import time, init_db, and time to the first 200 response.
+
+Each measurement starts a fresh interpreter so module caches don't carry
+over between runs:
+
+- import: `import main`, with the slowest modules from -X importtime
+- init_db: connect to MONGO_URL and run init_db (index creation included)
+- serve: launch uvicorn and poll /ops/livez until the first 200, then
+  /ops/readyz until required warmups report ready
+
+Reports the median and worst of --runs runs. Needs a reachable mongod for
+init_db and readyz:
+
+    MONGO_URL=mongodb://localhost:27017 python scripts/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API = "/server/api/v1"
+POLL_SECONDS = 0.01
+
+_TIME_IMPORT = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+_TIME_INIT_DB = (
+    "import asyncio, time; import main; from app.database import init_db; "
+    "t = time.perf_counter(); asyncio.run(init_db()); print(time.perf_counter() - t)"
+)
+
+
+def _python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def _slowest_imports(count: int) -> list[tuple[int, str]]:
+    # -X importtime lines: "import time: self [us] | cumulative | <indent>package",
+    # nested two spaces per level; main's direct imports sit one level in
+    stderr = _python("import main", "-X", "importtime").stderr
+    rows = re.findall(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)", stderr)
+    direct = [(int(us), name) for us, indent, name in rows if len(indent) == 2]
+    return sorted(direct, reverse=True)[:count]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(client: httpx.Client, server: subprocess.Popen, path: str, started: float, deadline: float) -> float | None:
+    # Give up early if startup failed and uvicorn exited
+    while time.perf_counter() < deadline and server.poll() is None:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(POLL_SECONDS)
+    return None
+
+
+def _serve(timeout: float) -> tuple[float | None, float | None]:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            deadline = started + timeout
+            live = _wait_for(client, server, f"{API}/ops/livez", started, deadline)
+            ready = _wait_for(client, server, f"{API}/ops/readyz", started, deadline) if live is not None else None
+    finally:
+        server.terminate()
+        server.wait()
+    return live, ready
+
+
+def _summary(label: str, samples: list[float | None]):
+    done = sorted(s for s in samples if s is not None)
+    if not done:
+        print(f"{label:>8}  no successful run")
+        return
+    failed = len(samples) - len(done)
+    print(f"{label:>8}  median {done[len(done) // 2] * 1000:>7.0f}ms  worst {done[-1] * 1000:>7.0f}ms"
+          + (f"  ({failed} timed out)" if failed else ""))
+
+
+def main(runs: int, timeout: float) -> int:
+    print(f"{runs} runs each, fresh interpreter per run")
+    _summary("import", [float(_python(_TIME_IMPORT).stdout) for _ in range(runs)])
+    for us, name in _slowest_imports(5):
+        print(f"          {us / 1000:>7.1f}ms  {name}")
+    try:
+        _summary("init_db", [float(_python(_TIME_INIT_DB).stdout) for _ in range(runs)])
+    except subprocess.CalledProcessError as e:
+        print(f" init_db  failed: {e.stderr.strip().splitlines()[-1]}")
+    served = [_serve(timeout) for _ in range(runs)]
+    _summary("livez", [live for live, _ in served])
+    _summary("readyz", [ready for _, ready in served])
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each server")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.timeout))
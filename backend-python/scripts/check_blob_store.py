@@ -0,0 +1,134 @@
+"""
+Blob store check: run the refcounting store against each storage backend.
+
+The same scenarios run against LocalBlobStorage in a temp directory and
+against ObjectStorageStandIn, an in-memory stand-in with object-store
+semantics (flat keys, whole-object puts, server-side timestamps). That is
+the contract an S3-compatible backend has to meet. Blob documents go to a
+scratch database on a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python scripts/check_blob_store.py
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from beanie import init_beanie  # noqa: E402
+from app.database import client  # noqa: E402
+from app.models.blob import Blob  # noqa: E402
+from app.services import blob_store  # noqa: E402
+from app.services.blob_store import BlobStorage, LocalBlobStorage, blob_key, release_blob, store_blob  # noqa: E402
+
+SCRATCH_DB = os.getenv("BLOB_CHECK_DB", "founderhq_blobcheck")
+
+
+class ObjectStorageStandIn(BlobStorage):
+    """In-memory object store: key -> (bytes, last-modified)."""
+
+    def __init__(self, bucket: str = "founderhq-media"):
+        self.bucket = bucket
+        self.objects: dict[str, tuple[bytes, float]] = {}
+
+    async def put(self, src_path: str, key: str):
+        with open(src_path, "rb") as f:
+            self.objects[key] = (f.read(), time.time())
+        os.remove(src_path)  # the store hands over ownership of the temp file
+
+    async def delete(self, key: str, grace_seconds: int = 0) -> bool:
+        entry = self.objects.get(key)
+        if entry is None or time.time() - entry[1] < grace_seconds:
+            return False
+        del self.objects[key]
+        return True
+
+    async def exists(self, key: str) -> bool:
+        return key in self.objects
+
+    def url(self, key: str) -> str:
+        return f"https://{self.bucket}.objects.local/{key}"
+
+    def key_for_url(self, url: str) -> str | None:
+        prefix = f"https://{self.bucket}.objects.local/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+
+async def _upload(workdir: str, content: bytes, ext: str = ".pdf") -> str:
+    """What save_upload does after streaming: a hashed temp file handed to the store."""
+    fd, tmp_path = tempfile.mkstemp(dir=workdir, prefix=".tmp-", suffix=ext)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    sha256 = hashlib.sha256(content).hexdigest()
+    url = await store_blob(tmp_path, sha256, ext, len(content))
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return url
+
+
+async def _refcount(sha256: str) -> int | None:
+    doc = await Blob.get_motor_collection().find_one({"_id": sha256})
+    return None if doc is None else doc["refcount"]
+
+
+async def _check(storage: BlobStorage, workdir: str):
+    blob_store.blob_storage = storage
+    await Blob.get_motor_collection().delete_many({})
+    deck = b"%PDF-1.7 pitch deck " + os.urandom(32)
+    sha256 = hashlib.sha256(deck).hexdigest()
+    key = blob_key(sha256, ".pdf")
+
+    first = await _upload(workdir, deck)
+    second = await _upload(workdir, deck)
+    assert first == second == storage.url(key), "identical uploads share one URL"
+    assert await _refcount(sha256) == 2, "each upload adds a reference"
+    assert await storage.exists(key)
+
+    await release_blob(first)
+    assert await _refcount(sha256) == 1 and await storage.exists(key), "still referenced"
+
+    blob_store.BLOB_DELETE_GRACE_SECONDS = 3600
+    await release_blob(second)
+    assert await _refcount(sha256) is None, "document goes at zero references"
+    assert await storage.exists(key), "bytes rewritten within the grace period survive"
+
+    blob_store.BLOB_DELETE_GRACE_SECONDS = 0
+    third = await _upload(workdir, deck)
+    await release_blob(third)
+    await release_blob(third)  # a retried delete must not go negative
+    assert await _refcount(sha256) is None and not await storage.exists(key), "unreferenced bytes removed"
+
+    legacy_key = "0f8fad5b-d9cb-469f-a165-70867728950e.png"
+    fd, tmp_path = tempfile.mkstemp(dir=workdir)
+    os.close(fd)
+    await storage.put(tmp_path, legacy_key)
+    await release_blob(storage.url(legacy_key))
+    assert not await storage.exists(legacy_key), "pre-blob-store files are deleted through the storage"
+    assert storage.key_for_url("/etc/passwd") is None
+
+
+async def main() -> int:
+    await init_beanie(database=client[SCRATCH_DB], document_models=[Blob])
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            backends = {
+                "local": LocalBlobStorage(os.path.join(workdir, "uploads")),
+                "object-store stand-in": ObjectStorageStandIn(),
+            }
+            for name, storage in backends.items():
+                try:
+                    await _check(storage, workdir)
+                except AssertionError as e:
+                    print(f"FAIL  {name}: {e}")
+                    return 1
+                print(f"ok    {name}")
+    finally:
+        await client.drop_database(SCRATCH_DB)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
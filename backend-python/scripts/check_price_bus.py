@@ -0,0 +1,258 @@
+"""
+Price bus check: run RedisPriceBus replicas against an in-memory Redis stand-in.
+
+RedisStandIn implements the handful of commands the bus uses (GET, SET NX
+PX, EVAL of the lease scripts, PUBLISH, pipelines and pub/sub) with Redis
+semantics: bytes values, millisecond expiry and fan-out to every
+subscriber. Several buses share one stand-in the way replicas share one
+Redis, and the check covers lease election and failover, snapshot
+publish/consume, warm start from the latest snapshot, and the event
+channel. No server is needed:
+
+    python scripts/check_price_bus.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import market_service, price_bus  # noqa: E402
+from app.services.price_bus import RedisPriceBus  # noqa: E402
+
+LEASE_MS = 200  # short lease so expiry can be observed quickly
+WAIT_SECONDS = 1.0
+
+
+def _b(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class RedisStandIn:
+    """In-memory Redis shared by every client: key -> (bytes, expires-at or None)."""
+
+    def __init__(self):
+        self.data: dict[str, tuple[bytes, float | None]] = {}
+        self.subscribers: dict[str, set["_PubSub"]] = {}
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and time.monotonic() >= entry[1]:
+            del self.data[key]
+            return None
+        return entry[0]
+
+    def set(self, key: str, value, nx: bool = False, px: int | None = None) -> bool | None:
+        if nx and self.get(key) is not None:
+            return None
+        self.data[key] = (_b(value), time.monotonic() + px / 1000 if px else None)
+        return True
+
+    def publish(self, channel: str, data) -> int:
+        message = {"type": "message", "channel": channel.encode(), "data": _b(data)}
+        receivers = self.subscribers.get(channel, set())
+        for pubsub in receivers:
+            pubsub.queue.put_nowait(message)
+        return len(receivers)
+
+    def client(self) -> "_Client":
+        return _Client(self)
+
+
+class _Client:
+    """The redis.asyncio client surface RedisPriceBus calls."""
+
+    def __init__(self, server: RedisStandIn):
+        self.server = server
+        self.closed = False
+
+    async def get(self, key: str):
+        return self.server.get(key)
+
+    async def set(self, key: str, value, nx: bool = False, px: int | None = None):
+        return self.server.set(key, value, nx=nx, px=px)
+
+    async def publish(self, channel: str, data):
+        return self.server.publish(channel, data)
+
+    async def eval(self, script: str, numkeys: int, *args):
+        key, owner = args[0], _b(args[1])
+        if self.server.get(key) != owner:
+            return 0
+        if script == price_bus._RENEW_SCRIPT:
+            self.server.data[key] = (owner, time.monotonic() + int(args[2]) / 1000)
+            return 1
+        if script == price_bus._RELEASE_SCRIPT:
+            del self.server.data[key]
+            return 1
+        raise ValueError("unknown script")
+
+    def pipeline(self) -> "_Pipeline":
+        return _Pipeline(self.server)
+
+    def pubsub(self) -> "_PubSub":
+        return _PubSub(self.server)
+
+    async def close(self):
+        self.closed = True
+
+
+class _Pipeline:
+    def __init__(self, server: RedisStandIn):
+        self.server = server
+        self.commands: list[tuple] = []
+
+    def set(self, key: str, value, **kwargs):
+        self.commands.append((self.server.set, key, value, kwargs))
+        return self
+
+    def publish(self, channel: str, data):
+        self.commands.append((self.server.publish, channel, data, {}))
+        return self
+
+    async def execute(self) -> list:
+        return [fn(a, b, **kwargs) for fn, a, b, kwargs in self.commands]
+
+
+class _PubSub:
+    def __init__(self, server: RedisStandIn):
+        self.server = server
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.channels: set[str] = set()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.server.subscribers.setdefault(channel, set()).add(self)
+            self.channels.add(channel)
+            self.queue.put_nowait({"type": "subscribe", "channel": channel.encode(), "data": len(self.channels)})
+
+    async def unsubscribe(self, *channels: str):
+        for channel in channels:
+            self.server.subscribers.get(channel, set()).discard(self)
+            self.channels.discard(channel)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def close(self):
+        await self.unsubscribe(*list(self.channels))
+
+
+async def _until(predicate) -> bool:
+    deadline = time.monotonic() + WAIT_SECONDS
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def _started(server: RedisStandIn) -> RedisPriceBus:
+    bus = RedisPriceBus(client=server.client())
+    await bus.start()
+    return bus
+
+
+async def _check_election(server: RedisStandIn):
+    a, b = await _started(server), await _started(server)
+    assert await a.is_leader() and a.leader, "first caller takes the lease"
+    assert not await b.is_leader() and not b.leader, "only one leader at a time"
+    assert await a.is_leader(), "leader renews its own lease"
+    await a.stop()
+    assert a.redis.closed
+    assert await b.is_leader(), "stop() releases the lease for the next replica"
+
+    await asyncio.sleep(LEASE_MS * 1.5 / 1000)  # b stops renewing, as if its process hung
+    c = await _started(server)
+    assert await c.is_leader(), "an expired lease is taken over"
+    assert not await b.is_leader(), "a stale leader notices it lost the lease"
+    for bus in (b, c):
+        await bus.stop()
+
+
+async def _check_publish(server: RedisStandIn, applied: list):
+    leader, follower = await _started(server), await _started(server)
+    assert await leader.is_leader()
+    snapshot = market_service.produce_snapshot()
+    applied.clear()
+    await leader.publish(snapshot)
+    assert await _until(lambda: len(applied) == 2), "every replica consumes the tick, publisher included"
+    consumers = {task for task, _ in applied}
+    assert consumers == {leader._consumer, follower._consumer}
+    assert all(s == snapshot for _, s in applied), "snapshots arrive intact"
+    assert market_service.get_market_snapshot() == snapshot
+    for bus in (leader, follower):
+        await bus.stop()
+
+
+async def _check_warm_start(server: RedisStandIn):
+    publisher = await _started(server)
+    snapshot = market_service.produce_snapshot()
+    await publisher.publish(snapshot)
+    await publisher.stop()
+    market_service._snapshot, market_service._stocks = {}, []
+    late = await _started(server)
+    assert market_service._snapshot == snapshot, "a new replica starts from the stored snapshot"
+    assert len(market_service.get_stocks_list()) == len(snapshot)
+    await late.stop()
+
+
+async def _check_events(server: RedisStandIn):
+    a, b = await _started(server), await _started(server)
+    received: dict[str, list[dict]] = {"a": [], "b": []}
+
+    def recorder(name: str):
+        async def handle(event: dict):
+            received[name].append(event)
+        return handle
+
+    async def broken(event: dict):
+        raise RuntimeError("handler failure")
+
+    a.on_event(broken)
+    a.on_event(recorder("a"))
+    b.on_event(recorder("b"))
+    event = {"type": "alert_removed", "id": "0" * 24}
+    await a.publish_event(event)
+    assert await _until(lambda: received["a"] and received["b"]), "every replica gets the event"
+    await asyncio.sleep(0.05)
+    assert received == {"a": [event], "b": [event]}, "exactly once each, past a failing handler"
+    await b.publish_event({"type": "alert_added", "alert": {}})
+    assert await _until(lambda: len(received["a"]) == 2), "the consumer survives a failing handler"
+    assert a._consumer is not None and not a._consumer.done()
+    for bus in (a, b):
+        await bus.stop()
+
+
+async def main() -> int:
+    price_bus._LEASE_MS = LEASE_MS
+    applied: list = []
+    apply_snapshot = price_bus.apply_snapshot
+
+    def recording_apply(snapshot: dict):
+        applied.append((asyncio.current_task(), snapshot))
+        apply_snapshot(snapshot)
+
+    price_bus.apply_snapshot = recording_apply
+    checks = {
+        "lease election and failover": _check_election,
+        "publish and consume": lambda server: _check_publish(server, applied),
+        "warm start from latest snapshot": _check_warm_start,
+        "event channel": _check_events,
+    }
+    for name, check in checks.items():
+        try:
+            await check(RedisStandIn())
+        except AssertionError as e:
+            print(f"FAIL  {name}: {e}")
+            return 1
+        print(f"ok    {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
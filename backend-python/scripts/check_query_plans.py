@@ -0,0 +1,160 @@
+"""
+Query-plan check: fail when an API query shape is served by a collection scan.
+
+Every filter/sort the routers and request-path services issue is run
+through explain() on a scratch database whose indexes init_db creates
+exactly as in production. Any winning plan containing COLLSCAN is printed
+and the script exits 1, so a new query shape cannot ship without an index.
+
+Needs a local mongod (nothing is written outside the scratch database):
+
+    MONGO_URL=mongodb://localhost:27017 python scripts/check_query_plans.py
+
+Background full scans (matching index rebuilds, the orphan file sweep) are
+deliberate and not listed.
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DB_NAME"] = os.getenv("PLAN_CHECK_DB", "founderhq_plancheck")
+os.environ["DROP_UNDECLARED_INDEXES"] = "true"  # scratch database: mirror the models exactly
+
+from beanie import PydanticObjectId  # noqa: E402
+from app.database import client, init_db, DB_NAME  # noqa: E402
+from app.api.v1.jobs import _search_filter  # noqa: E402
+from app.api.v1.pagination import encode_cursor, keyset_filter  # noqa: E402
+from app.api.v1.auth import prefix_filter  # noqa: E402
+from app.models.user import search_tokens  # noqa: E402
+
+_NOW = datetime.utcnow()
+_OID = PydanticObjectId()
+_DESC = [("created_at", -1), ("_id", -1)]
+
+
+def _cursor(field: str, value=_NOW, op: str = "$lt", parse=datetime.fromisoformat) -> dict:
+    return keyset_filter(encode_cursor(value, _OID), field, op, parse=parse)
+
+
+def _user_search(field: str, q: str) -> dict:
+    return {"$and": [prefix_filter(field, search_tokens(q)[:5]), {"_id": {"$nin": [_OID]}}]}
+
+
+def _find_shapes() -> list[tuple[str, str, dict, list | None]]:
+    """(label, collection, filter, sort) for every request-path find."""
+    shapes = [
+        ("login / register email lookup", "users", {"email": "founder@example.com"}, None),
+        ("user search by name, one word", "users", _user_search("name_terms", "ana"), None),
+        ("user search by name, two words", "users", _user_search("name_terms", "ana sharma"), None),
+        ("user search fill-up", "users", _user_search("search_terms", "ana acme"), None),
+
+        ("feed page", "community_posts", {"deleted_at": None}, [("timestamp", -1), ("_id", -1)]),
+        ("feed next page", "community_posts", {"deleted_at": None, **_cursor("timestamp")},
+         [("timestamp", -1), ("_id", -1)]),
+        ("post reaper", "community_posts", {"deleted_at": {"$lte": _NOW}}, None),
+        ("comment thread", "community_comments", {"post_id": str(_OID)}, [("timestamp", 1), ("_id", 1)]),
+        ("comment thread next page", "community_comments",
+         {"post_id": str(_OID), **_cursor("timestamp", op="$gt")}, [("timestamp", 1), ("_id", 1)]),
+
+        ("alerts by owner", "market_alerts", {"user_id": _OID}, None),
+        ("alert index load", "market_alerts", {"is_active": True, "triggered": False}, None),
+        ("news page", "news_articles", {}, [("scraped_at", -1)]),
+        ("news window", "news_articles",
+         {"scraped_at": {"$gte": _NOW - timedelta(days=1), "$lt": _NOW}}, [("scraped_at", -1)]),
+        ("news dedupe", "news_articles", {"url_hash": {"$in": ["a" * 64, "b" * 64]}}, None),
+
+        ("schedules by owner", "schedules", {"user_id": str(_OID)}, None),
+        ("reaction toggle", "reactions", {"target_type": "post", "target_id": _OID, "user_id": str(_OID)}, None),
+        ("reactions of a target", "reactions", {"target_type": "poc", "target_id": _OID}, None),
+        ("reacted ids of a page", "reactions",
+         {"target_type": "post", "target_id": {"$in": [_OID, PydanticObjectId()]}, "user_id": str(_OID)}, None),
+    ]
+
+    job_filters = {
+        "all": _search_filter(None, None, None, None, None, None, None, None, None),
+        "role": _search_filter("engineering", None, None, None, None, None, None, None, None),
+        "one skill": _search_filter(None, "python", None, None, None, None, None, None, None),
+        "two skills": _search_filter(None, "python,react", None, None, None, None, None, None, None),
+        "location": _search_filter(None, None, "Bengaluru", None, None, None, None, None, None),
+        "equity + pay": _search_filter(None, None, None, 0.5, 2.0, 50_000, None, None, None),
+        "posted this week": _search_filter(None, None, None, None, None, None, None, _NOW - timedelta(days=7), None),
+    }
+    for name, query in job_filters.items():
+        shapes.append((f"jobs: {name}", "jobs", query, _DESC))
+    shapes.append(("jobs: next page", "jobs", {"$and": [job_filters["role"], _cursor("created_at")]}, _DESC))
+
+    poc_sorts = {"hot": ("hot_score", 1.5, float), "top": ("upvotes", 3, int), "new": ("created_at", _NOW, None)}
+    poc_filters = {"all": {}, "tag": {"tags": "fintech"}, "stage": {"stage": "mvp"},
+                   "tag + stage": {"tags": "fintech", "stage": "mvp"}}
+    for sort, (field, value, parse) in poc_sorts.items():
+        order = [(field, -1), ("_id", -1)]
+        for name, query in poc_filters.items():
+            shapes.append((f"pocs {sort}: {name}", "pocs", query, order))
+        cursor = _cursor(field, value, parse=parse or datetime.fromisoformat)
+        shapes.append((f"pocs {sort}: next page", "pocs", {"$and": [{"tags": "fintech"}, cursor]}, order))
+    return shapes
+
+
+def _aggregate_shapes() -> list[tuple[str, str, list]]:
+    return [
+        ("job facets", "jobs", [{"$match": _search_filter("engineering", "python", None, None, None, None, None, None, None)},
+                                {"$count": "n"}]),
+        ("comment previews", "community_comments", [
+            {"$match": {"post_id": {"$in": [str(_OID), str(PydanticObjectId())]}}},
+            {"$sort": {"post_id": 1, "timestamp": 1, "_id": 1}},
+        ]),
+    ]
+
+
+def _stages(plan) -> list[str]:
+    """Every stage name anywhere in an explain document."""
+    found = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.append(plan["stage"])
+        for value in plan.values():
+            found.extend(_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            found.extend(_stages(value))
+    return found
+
+
+def _winning(explain: dict) -> dict:
+    # find explains carry queryPlanner at the top; aggregations nest it under stages
+    if "queryPlanner" in explain:
+        return explain["queryPlanner"]["winningPlan"]
+    return {"stages": [s.get("$cursor", {}).get("queryPlanner", {}).get("winningPlan", {})
+                       for s in explain.get("stages", [])]}
+
+
+async def main() -> int:
+    await init_db()
+    db = client[DB_NAME]
+    failures = 0
+
+    async def check(label: str, explain: dict):
+        nonlocal failures
+        stages = _stages(_winning(explain))
+        verdict = "FAIL" if "COLLSCAN" in stages else "ok"
+        failures += verdict == "FAIL"
+        print(f"{verdict:4}  {label:40}  {' <- '.join(stages)}")
+
+    for label, collection, query, sort in _find_shapes():
+        cmd = {"find": collection, "filter": query, "limit": 50}
+        if sort:
+            cmd["sort"] = dict(sort)
+        await check(label, await db.command("explain", cmd, verbosity="queryPlanner"))
+
+    for label, collection, pipeline in _aggregate_shapes():
+        cmd = {"aggregate": collection, "pipeline": pipeline, "cursor": {}}
+        await check(label, await db.command("explain", cmd, verbosity="queryPlanner"))
+
+    print(f"{failures} query shape(s) fall back to a collection scan" if failures else "No collection scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
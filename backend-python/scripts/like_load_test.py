@@ -0,0 +1,125 @@
+"""
+Like load test: many users toggle a like on the same post at the same time.
+
+Registers an author and --users likers, creates one post, then fires every
+like request at once (one per user, all in flight together). Half the
+users then unlike concurrently. After each wave the post's likes_count
+must equal the number of users still liking it once the write-behind
+counter buffer has flushed. Reports p50/p95/p99 latency per wave and
+exits 1 on any failed request or wrong count.
+
+Run against a server backed by a real mongod (the test users and post
+stay behind, tagged with the run id):
+
+    uvicorn main:app --port 8000 &
+    python scripts/like_load_test.py --url http://localhost:8000 --users 500
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+import httpx
+
+API = "/server/api/v1"
+SETTLE_SECONDS = 10.0  # counter buffer flushes every COUNTER_FLUSH_MS; leave plenty of room
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _register(client: httpx.AsyncClient, run: str, i: int | str, gate: asyncio.Semaphore) -> str:
+    async with gate:
+        r = await client.post(f"{API}/auth/register", json={
+            "name": f"Load Test {i}",
+            "email": f"loadtest-{run}-{i}@example.com",
+            "phone_number": "0000000000",
+            "password": f"pw-{run}",
+        })
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def _like(client: httpx.AsyncClient, post_id: str, token: str, start: asyncio.Event):
+    await start.wait()
+    began = time.perf_counter()
+    try:
+        r = await client.post(f"{API}/community/{post_id}/like", headers={"Authorization": f"Bearer {token}"})
+        ok = r.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    return ok, (time.perf_counter() - began) * 1000
+
+
+async def _wave(client: httpx.AsyncClient, post_id: str, tokens: list[str], label: str) -> bool:
+    start = asyncio.Event()
+    tasks = [asyncio.create_task(_like(client, post_id, t, start)) for t in tokens]
+    await asyncio.sleep(0)  # every request parked on the start line
+    began = time.perf_counter()
+    start.set()
+    results = await asyncio.gather(*tasks)
+    wall = time.perf_counter() - began
+    latencies = [ms for _, ms in results]
+    failed = sum(not ok for ok, _ in results)
+    print(
+        f"{label}: {len(tokens)} requests in {wall:.2f}s ({len(tokens) / wall:.0f} req/s), {failed} failed; "
+        f"p50 {_percentile(latencies, 50):.1f}ms  p95 {_percentile(latencies, 95):.1f}ms  "
+        f"p99 {_percentile(latencies, 99):.1f}ms  max {max(latencies):.1f}ms"
+    )
+    return failed == 0
+
+
+async def _likes_count(client: httpx.AsyncClient, post_id: str, token: str) -> int | None:
+    r = await client.get(f"{API}/community/", params={"limit": 100}, headers={"Authorization": f"Bearer {token}"})
+    r.raise_for_status()
+    return next((p["likes_count"] for p in r.json() if p["id"] == post_id), None)
+
+
+async def _settled_count(client: httpx.AsyncClient, post_id: str, token: str, expected: int) -> int | None:
+    deadline = time.monotonic() + SETTLE_SECONDS
+    while True:
+        count = await _likes_count(client, post_id, token)
+        if count == expected or time.monotonic() > deadline:
+            return count
+        await asyncio.sleep(0.25)
+
+
+async def main(url: str, users: int) -> int:
+    run = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        # Registration hashes passwords; keep it from dominating server CPU
+        gate = asyncio.Semaphore(32)
+        author = await _register(client, run, "author", gate)
+        tokens = await asyncio.gather(*(_register(client, run, i, gate) for i in range(users)))
+        r = await client.post(
+            f"{API}/community/",
+            data={"content": f"Like load test {run}", "tags": "[]"},
+            headers={"Authorization": f"Bearer {author}"},
+        )
+        r.raise_for_status()
+        post_id = r.json()["id"]
+        print(f"run {run}: post {post_id}, {users} users")
+
+        ok = True
+        for label, wave, expected in (
+            ("like", tokens, users),
+            ("unlike", tokens[: users // 2], users - users // 2),
+        ):
+            ok &= await _wave(client, post_id, wave, label)
+            count = await _settled_count(client, post_id, author, expected)
+            print(f"  likes_count {count}, expected {expected}")
+            ok &= count == expected
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.url, args.users)))
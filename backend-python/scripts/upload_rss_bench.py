@@ -0,0 +1,125 @@
+"""
+Upload memory benchmark: many large uploads at once, watching server RSS.
+
+Streams --concurrency multipart uploads of --size-mb each (50 x 100MB by
+default) to POST /community/ at the same time, generated chunk by chunk so
+the client never holds a whole body. While they run, the server's RSS is
+sampled from /proc/<pid>/status. Reports status codes, wall time and the
+server's RSS baseline and peak.
+
+With the default sizes every request is over the 50MB file limit and should
+be refused from its Content-Length before anything is parsed; --chunked
+drops the header so the streaming cap has to catch it; --size-mb 40 measures
+accepted uploads.
+
+    uvicorn main:app --port 8000 &
+    python scripts/upload_rss_bench.py --url http://localhost:8000 --pid $!
+"""
+import argparse
+import asyncio
+import collections
+import sys
+import time
+import uuid
+from typing import AsyncIterator, Callable
+
+import httpx
+
+API = "/server/api/v1"
+CHUNK = 1024 * 1024
+SAMPLE_SECONDS = 0.05
+
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def _sample_rss(pid: int, samples: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        samples.append(_rss_mb(pid))
+        await asyncio.sleep(SAMPLE_SECONDS)
+
+
+def _multipart(size: int, seed: bytes) -> tuple[str, int, Callable[[], AsyncIterator[bytes]]]:
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"content\"\r\n\r\nupload benchmark\r\n"
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"deck.pdf\"\r\n"
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    # Distinct content per upload so the blob store cannot dedupe the work away
+    chunk = (seed * (CHUNK // len(seed) + 1))[:CHUNK]
+
+    async def body():
+        yield head
+        sent = 0
+        while sent < size:
+            n = min(CHUNK, size - sent)
+            yield chunk[:n]
+            sent += n
+        yield tail
+
+    return f"multipart/form-data; boundary={boundary}", len(head) + size + len(tail), body
+
+
+async def _upload(client: httpx.AsyncClient, token: str, size: int, chunked: bool, i: int) -> int | str:
+    content_type, length, body = _multipart(size, uuid.uuid4().bytes + i.to_bytes(4, "big"))
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": content_type}
+    if not chunked:
+        headers["Content-Length"] = str(length)
+    try:
+        r = await client.post(f"{API}/community/", content=body(), headers=headers)
+        return r.status_code
+    except httpx.HTTPError as e:
+        # A server that refuses early may close the connection mid-body
+        return type(e).__name__
+
+
+async def main(url: str, pid: int | None, concurrency: int, size_mb: int, chunked: bool) -> int:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=600) as client:
+        run = uuid.uuid4().hex[:8]
+        r = await client.post(f"{API}/auth/register", json={
+            "name": "Upload Bench", "email": f"uploadbench-{run}@example.com",
+            "phone_number": "0000000000", "password": f"pw-{run}",
+        })
+        r.raise_for_status()
+        token = r.json()["access_token"]
+
+        samples: list[float] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(_sample_rss(pid, samples, stop)) if pid else None
+        await asyncio.sleep(0.2)
+        baseline = samples[0] if samples else None
+
+        began = time.perf_counter()
+        statuses = await asyncio.gather(
+            *(_upload(client, token, size_mb * CHUNK, chunked, i) for i in range(concurrency))
+        )
+        wall = time.perf_counter() - began
+        stop.set()
+        if sampler:
+            await sampler
+
+    print(f"{concurrency} x {size_mb}MB uploads ({'chunked' if chunked else 'Content-Length'}) in {wall:.2f}s")
+    print("  status codes:", dict(collections.Counter(statuses)))
+    if samples:
+        print(f"  server RSS: baseline {baseline:.0f}MB, peak {max(samples):.0f}MB, "
+              f"growth {max(samples) - baseline:.0f}MB over {len(samples)} samples")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--pid", type=int, help="server process to sample RSS from (Linux)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--chunked", action="store_true", help="omit Content-Length")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.url, args.pid, args.concurrency, args.size_mb, args.chunked)))